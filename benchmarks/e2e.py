@@ -0,0 +1,327 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import multiprocessing
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import suppress
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Literal, NamedTuple, Optional
+
+from benchmarks.stubs import Playlist, PlexStub, SpotifyStub
+from dashy.displays import Display
+from dashy.services import check_registry
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+    from dashy.dashboards import Dashboard
+    from dashy.dashy import Dashy
+
+PLEX_USER = "benchmark"
+PLEX_TOKEN = "benchmark"  # noqa: S105
+
+
+class Scenario(NamedTuple):
+    dashboard: Literal["spotify", "plex"]
+    url: str
+    playlist_start: float
+    track_length: float
+    duration: float
+    renderer: Literal["HTML", "NATIVE"]
+    display: Literal["fake", "save", "framebuffer"]
+    panel_refresh: float
+    profile: bool
+
+
+def rss() -> int:
+    with suppress(OSError), Path("/proc/self/status").open() as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return math.nan
+    ordered = sorted(values)
+    return ordered[min(max(math.ceil(q * len(ordered)) - 1, 0), len(ordered) - 1)]
+
+
+class FakePanel(Display):
+    dashy: Dashy
+
+    def __init__(
+        self,
+        playlist: Playlist,
+        *,
+        inner: Optional[Display] = None,
+        refresh_time: float = 0.0,
+    ) -> None:
+        self.playlist = playlist
+        self.inner = inner
+        self.refresh_time = refresh_time
+        self.frames = 0
+        self.latencies: list[float] = []
+        self.last_index = 0
+
+    async def start(self, dashy: Dashy) -> None:
+        self.dashy = dashy
+        if self.inner is not None:
+            await self.inner.start(dashy)
+
+    async def stop(self) -> None:
+        if self.inner is not None:
+            await self.inner.stop()
+
+    @property
+    def resolution(self) -> tuple[int, int]:
+        return (800, 480) if self.inner is None else self.inner.resolution
+
+    def blocking_refresh(self) -> None:
+        time.sleep(self.refresh_time)
+
+    async def show_image(self, image: Image.Image) -> None:
+        if self.inner is not None:
+            await self.inner.show_image(image)
+        if self.refresh_time:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self.blocking_refresh)
+
+        now = time.time()
+        self.frames += 1
+        index = self.playlist.index(now)
+        if index != self.last_index:
+            self.latencies.append(now - self.playlist.changed_at(index))
+            self.last_index = index
+
+
+def make_dashboard(scenario: Scenario, workdir: Path) -> Dashboard:
+    if scenario.dashboard == "spotify":
+        from dashy.dashboards.spotify_dashboard import SpotifyDashboard
+
+        credentials = workdir / "spotify-credentials.json"
+        credentials.write_text(
+            json.dumps(
+                {
+                    "client_id": "benchmark",
+                    "client_secret": "benchmark",
+                    "refresh_token": "benchmark",
+                    "access_token": "expired",
+                    "expires": 0,
+                }
+            )
+        )
+        return SpotifyDashboard(
+            credentials=str(credentials),
+            renderer=scenario.renderer,
+            api_url=scenario.url,
+            accounts_url=scenario.url,
+        )
+
+    from dashy.dashboards.plex_dashboard import PlexDashboard
+
+    return PlexDashboard(
+        server=scenario.url,
+        token=PLEX_TOKEN,
+        user=PLEX_USER,
+        renderer=scenario.renderer,
+    )
+
+
+def make_display(scenario: Scenario, workdir: Path) -> Optional[Display]:
+    if scenario.display == "save":
+        from dashy.displays.save_to_disk import SaveToDisk
+
+        return SaveToDisk(workdir / "screenshot.png")
+    if scenario.display == "framebuffer":
+        from dashy.displays.framebuffer import Framebuffer
+
+        return Framebuffer(workdir / "dashy.fb")
+    return None
+
+
+async def run_scenario(scenario: Scenario) -> dict[str, Any]:
+    from dashy.dashy import Dashy
+
+    with tempfile.TemporaryDirectory() as workdir:
+        rss_before = rss()
+        playlist = Playlist(scenario.track_length, scenario.playlist_start)
+        panel = FakePanel(
+            playlist,
+            inner=make_display(scenario, Path(workdir)),
+            refresh_time=scenario.panel_refresh,
+        )
+
+        dashy = Dashy()
+        dashy.display = panel
+        dashy.dashboards = [make_dashboard(scenario, Path(workdir))]
+        if scenario.profile:
+            from dashy.utils.profiler import SamplingProfiler
+
+            dashy.profiler = SamplingProfiler(Path(workdir) / "profile")
+
+        cpu_before = time.process_time()
+        task = asyncio.create_task(dashy.run())
+        await asyncio.sleep(scenario.duration)
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+        cpu = time.process_time() - cpu_before
+        rss_after = rss()
+        await dashy.stop()
+
+    profile = {}
+    if dashy.profiler is not None:
+        for owner, stacks in dashy.profiler.samples.items():
+            profile[owner] = {
+                "samples": sum(stacks.values()),
+                "refresh": sum(
+                    count
+                    for stack, count in stacks.items()
+                    if ";blocking_refresh (" in stack
+                ),
+            }
+
+    return {
+        "dashboard": scenario.dashboard,
+        "owner": dashy.dashboards[0].name,
+        "profile": profile,
+        "frames": panel.frames,
+        "latencies": panel.latencies,
+        "cpu": cpu,
+        "rss_before": rss_before,
+        "rss_after": rss_after,
+        "summary": dashy.metrics.summary(),
+    }
+
+
+def run_worker(scenario: Scenario) -> dict[str, Any]:
+    logging.basicConfig(level=logging.WARNING)
+    return asyncio.run(run_scenario(scenario))
+
+
+async def run_benchmark(args: argparse.Namespace) -> list[dict[str, Any]]:
+    results = []
+    context = multiprocessing.get_context("spawn")
+    for dashboard in args.dashboards:
+        playlist = Playlist(args.track_length, time.time() + args.warmup)
+        stub = (
+            SpotifyStub(playlist)
+            if dashboard == "spotify"
+            else PlexStub(playlist, user=PLEX_USER)
+        )
+        await stub.start()
+        try:
+            scenario = Scenario(
+                dashboard=dashboard,
+                url=stub.url,
+                playlist_start=playlist.start,
+                track_length=args.track_length,
+                duration=args.warmup + args.duration,
+                renderer=args.renderer,
+                display=args.display,
+                panel_refresh=args.panel_refresh,
+                profile=args.profile,
+            )
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                result = await asyncio.wrap_future(pool.submit(run_worker, scenario))
+        finally:
+            await stub.stop()
+
+        result["requests"] = dict(stub.requests)
+        result["duration"] = scenario.duration
+        results.append(result)
+    return results
+
+
+def report(result: dict[str, Any]) -> None:
+    minutes = result["duration"] / 60
+    latencies = result["latencies"]
+    print(f"{result['dashboard']}:")  # noqa: T201
+    print(  # noqa: T201
+        f"  frames: {result['frames']} ({result['frames'] / minutes:.1f}/min),"
+        f" track changes seen: {len(latencies)}"
+    )
+    print(  # noqa: T201
+        "  change -> panel latency:"
+        f" p50={percentile(latencies, 0.5):.3f}s"
+        f" p95={percentile(latencies, 0.95):.3f}s"
+        f" max={max(latencies, default=math.nan):.3f}s"
+    )
+    requests = ", ".join(
+        f"{name}={count / minutes:.1f}/min"
+        for name, count in sorted(result["requests"].items())
+    )
+    print(f"  upstream requests: {requests}")  # noqa: T201
+    print(  # noqa: T201
+        f"  cpu: {result['cpu'] / result['duration'] * 100:.1f}%,"
+        f" rss: {result['rss_after'] / 2**20:.1f}MiB"
+        f" (+{(result['rss_after'] - result['rss_before']) / 2**20:.1f}MiB)"
+    )
+    if result["profile"]:
+        samples = ", ".join(
+            f"{owner}={counts['samples']} (refresh {counts['refresh']})"
+            for owner, counts in sorted(result["profile"].items())
+        )
+        print(f"  profile samples: {samples}")  # noqa: T201
+    for line in result["summary"]:
+        print(f"    {line}")  # noqa: T201
+
+
+def misattributed(result: dict[str, Any]) -> list[str]:
+    return [
+        f"{result['dashboard']}: {counts['refresh']} refresh samples charged to {owner}"
+        for owner, counts in result["profile"].items()
+        if owner != result["owner"] and counts["refresh"]
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Measure dashy render latency against local stub services."
+    )
+    parser.add_argument(
+        "--dashboards",
+        nargs="+",
+        choices=["spotify", "plex"],
+        default=["spotify", "plex"],
+    )
+    parser.add_argument("--duration", type=float, default=120.0)
+    parser.add_argument("--warmup", type=float, default=5.0)
+    parser.add_argument("--track-length", type=float, default=15.0)
+    parser.add_argument("--renderer", choices=["HTML", "NATIVE"], default="NATIVE")
+    parser.add_argument(
+        "--display", choices=["fake", "save", "framebuffer"], default="fake"
+    )
+    parser.add_argument("--panel-refresh", type=float, default=0.0)
+    parser.add_argument("--profile", action="store_true")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    errors = check_registry()
+    if errors:
+        parser.error("Invalid service registry:\n" + "\n".join(errors))
+
+    results = asyncio.run(run_benchmark(args))
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+    else:
+        for result in results:
+            report(result)
+
+    errors = [error for result in results for error in misattributed(result)]
+    if errors:
+        sys.exit("\n".join(errors))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import abc
+import asyncio
+import json
+import math
+import socket
+import time
+from collections import Counter
+from contextlib import suppress
+from io import BytesIO
+from typing import Any, Optional
+
+from aiohttp import WSMsgType, web
+from PIL import Image
+
+COVER_COUNT = 4
+COVER_SIZE = (640, 640)
+PROGRESS_INTERVAL = 1.0
+
+
+def make_cover(index: int) -> bytes:
+    hue = index * 255 // COVER_COUNT
+    image = Image.linear_gradient("L").resize(COVER_SIZE)
+    image = Image.merge(
+        "HSV",
+        (Image.new("L", COVER_SIZE, hue), Image.new("L", COVER_SIZE, 192), image),
+    ).convert("RGB")
+    buffer = BytesIO()
+    image.save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+class Playlist:
+    def __init__(self, track_length: float, start: Optional[float] = None) -> None:
+        self.track_length = track_length
+        self.start = time.time() if start is None else start
+
+    def index(self, now: Optional[float] = None) -> int:
+        elapsed = (time.time() if now is None else now) - self.start
+        return max(int(elapsed // self.track_length), 0)
+
+    def changed_at(self, index: int) -> float:
+        return self.start + index * self.track_length
+
+    def progress_ms(self, now: Optional[float] = None) -> int:
+        elapsed = (time.time() if now is None else now) - self.start
+        return int(math.fmod(max(elapsed, 0), self.track_length) * 1000)
+
+
+class Stub(abc.ABC):
+    def __init__(self, playlist: Playlist) -> None:
+        self.playlist = playlist
+        self.covers = [make_cover(index) for index in range(COVER_COUNT)]
+        self.requests: Counter[str] = Counter()
+        self.runner: Optional[web.AppRunner] = None
+        self.url = ""
+
+    @abc.abstractmethod
+    def routes(self, app: web.Application) -> None:
+        ...
+
+    async def start(self) -> None:
+        app = web.Application()
+        self.routes(app)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        await web.SockSite(self.runner, sock).start()
+        host, port = sock.getsockname()
+        self.url = f"http://{host}:{port}"
+
+    async def stop(self) -> None:
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
+
+    def cover(self, index: int) -> web.Response:
+        return web.Response(
+            body=self.covers[index % COVER_COUNT],
+            content_type="image/png",
+            headers={"Cache-Control": "max-age=86400"},
+        )
+
+
+class SpotifyStub(Stub):
+    def routes(self, app: web.Application) -> None:
+        app.router.add_post("/api/token", self.handle_token)
+        app.router.add_get("/v1/me/player/currently-playing", self.handle_playing)
+        app.router.add_get("/cover/{index}.png", self.handle_cover)
+
+    async def handle_token(self, _: web.Request) -> web.Response:
+        self.requests["token"] += 1
+        return web.json_response({"access_token": "benchmark", "expires_in": 3600})
+
+    async def handle_playing(self, _: web.Request) -> web.Response:
+        self.requests["currently-playing"] += 1
+        index = self.playlist.index()
+        return web.json_response(
+            {
+                "is_playing": True,
+                "currently_playing_type": "track",
+                "progress_ms": self.playlist.progress_ms(),
+                "item": {
+                    "id": f"track{index}",
+                    "type": "track",
+                    "name": f"Benchmark track {index}",
+                    "duration_ms": int(self.playlist.track_length * 1000),
+                    "artists": [{"name": "Dashy"}],
+                    "album": {
+                        "images": [{"url": f"{self.url}/cover/{index}.png"}],
+                    },
+                },
+            }
+        )
+
+    async def handle_cover(self, request: web.Request) -> web.Response:
+        self.requests["cover"] += 1
+        return self.cover(int(request.match_info["index"]))
+
+
+class PlexStub(Stub):
+    def __init__(self, playlist: Playlist, *, user: str) -> None:
+        super().__init__(playlist)
+        self.user = user
+        self.sockets: set[web.WebSocketResponse] = set()
+        self.task: Optional[asyncio.Task[None]] = None
+
+    def routes(self, app: web.Application) -> None:
+        app.router.add_get("/status/sessions", self.handle_sessions)
+        app.router.add_get("/library/metadata/{rating_key}", self.handle_metadata)
+        app.router.add_get("/art/{index}.png", self.handle_cover)
+        app.router.add_get("/:/websockets/notifications", self.handle_websocket)
+
+    async def start(self) -> None:
+        await super().start()
+        self.task = asyncio.create_task(self.notify_loop())
+
+    async def stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self.task
+        for ws in list(self.sockets):
+            await ws.close()
+        await super().stop()
+
+    def video(self, index: int, *, session: bool) -> str:
+        children = (
+            f'<Player state="playing" /><User title="{self.user}" />' if session else ""
+        )
+        return (
+            f'<Video sessionKey="1" ratingKey="{1000 + index}"'
+            f' guid="plex://episode/{index}" type="episode"'
+            f' title="Benchmark episode {index}" grandparentTitle="Dashy"'
+            f' parentIndex="1" index="{index + 1}" art="/art/{index}.png">'
+            f"{children}</Video>"
+        )
+
+    async def handle_sessions(self, _: web.Request) -> web.Response:
+        self.requests["sessions"] += 1
+        body = self.video(self.playlist.index(), session=True)
+        return web.Response(
+            text=f'<MediaContainer size="1">{body}</MediaContainer>',
+            content_type="application/xml",
+        )
+
+    async def handle_metadata(self, request: web.Request) -> web.Response:
+        self.requests["metadata"] += 1
+        index = int(request.match_info["rating_key"]) - 1000
+        body = self.video(index, session=False)
+        return web.Response(
+            text=f'<MediaContainer size="1">{body}</MediaContainer>',
+            content_type="application/xml",
+        )
+
+    async def handle_cover(self, request: web.Request) -> web.Response:
+        self.requests["art"] += 1
+        return self.cover(int(request.match_info["index"]))
+
+    async def handle_websocket(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.sockets.add(ws)
+        try:
+            async for message in ws:
+                if message.type == WSMsgType.ERROR:
+                    break
+        finally:
+            self.sockets.discard(ws)
+        return ws
+
+    def notification(self) -> str:
+        index = self.playlist.index()
+        rating_key = str(1000 + index)
+        payload: dict[str, Any] = {
+            "sessionKey": "1",
+            "ratingKey": rating_key,
+            "key": f"/library/metadata/{rating_key}",
+            "viewOffset": self.playlist.progress_ms(),
+            "state": "playing",
+        }
+        return json.dumps(
+            {
+                "NotificationContainer": {
+                    "type": "playing",
+                    "size": 1,
+                    "PlaySessionStateNotification": [payload],
+                }
+            }
+        )
+
+    async def notify_loop(self) -> None:
+        while True:
+            next_change = self.playlist.changed_at(self.playlist.index() + 1)
+            await asyncio.sleep(min(next_change - time.time(), PROGRESS_INTERVAL))
+            message = self.notification()
+            for ws in list(self.sockets):
+                with suppress(ConnectionError):
+                    await ws.send_str(message)
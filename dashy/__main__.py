@@ -1,22 +1,38 @@
 from __future__ import annotations
 
+import argparse
 import asyncio
 import logging
-import sys
 from pathlib import Path
 from typing import Any
 
 from dotenv import load_dotenv
 
 from dashy.dashy import Dashy
+from dashy.utils.profiler import SamplingProfiler
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="dashy")
+    parser.add_argument("config", nargs="?", default="conf.py")
+    parser.add_argument(
+        "--profile",
+        metavar="DIR",
+        help="sample the render loop and write collapsed stacks to DIR",
+    )
+    parser.add_argument(
+        "--profile-interval",
+        type=float,
+        default=10.0,
+        metavar="MS",
+        help="sampling interval in milliseconds (default: 10)",
+    )
+    args = parser.parse_args()
+
     load_dotenv()
 
     dashy = Dashy()
 
-    config_path = sys.argv[1] if len(sys.argv) > 1 else "conf.py"
-    with Path(config_path).open("r") as f:
+    with Path(args.config).open("r") as f:
         content = f.read()
     conf_globals: dict[str, Any] = {"DASHY": dashy}
     exec(content, conf_globals)
@@ -24,6 +40,11 @@ if __name__ == "__main__":
     loglevel = conf_globals.get("LOGLEVEL", logging.INFO)
     logging.basicConfig(level=loglevel)
 
+    if args.profile is not None:
+        dashy.profiler = SamplingProfiler(
+            args.profile, interval=args.profile_interval / 1000
+        )
+
     loop = asyncio.get_event_loop()
     try:
         loop.run_until_complete(dashy.run())
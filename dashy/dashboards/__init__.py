@@ -1,12 +1,21 @@
+from __future__ import annotations
+
 import abc
-from typing import Literal, Optional, Union
+from typing import TYPE_CHECKING, Literal, Optional, Union
 
-from PIL import Image
+if TYPE_CHECKING:
+    from PIL import Image
 
-from dashy.dashy import Dashy
+    from dashy.dashy import Dashy
 
 
 class Dashboard(abc.ABC):
+    probe_timeout: Optional[float] = 10.0
+
+    @property
+    def name(self) -> str:
+        return type(self).__name__
+
     @abc.abstractmethod
     async def start(self, dashy: Dashy) -> None:
         ...
@@ -17,9 +26,20 @@ class Dashboard(abc.ABC):
 
     @property
     @abc.abstractmethod
-    def min_interval(self) -> Optional[int]:
+    def min_interval(self) -> Optional[float]:
+        ...
+
+    @property
+    def required_services(self) -> list[type]:
+        return []
+
+    async def probe(self) -> bool:
+        return True
+
+    @abc.abstractmethod
+    async def update(self) -> Union[Literal["SKIP"], bool]:
         ...
 
     @abc.abstractmethod
-    async def next(self, *, force: bool) -> Union[Literal["SKIP"], None, Image.Image]:
+    async def render(self, resolution: tuple[int, int]) -> Image.Image:
         ...
@@ -2,25 +2,34 @@ from __future__ import annotations
 
 import asyncio
 import logging
+from functools import partial
 from io import BytesIO
-from typing import TYPE_CHECKING, Literal, Optional, Union, cast
+from typing import TYPE_CHECKING, Any, Literal, Optional, Union, cast
 from xml.etree.ElementTree import Element
 
 import aiohttp
 from bs4 import BeautifulSoup
 from defusedxml.ElementTree import fromstring as parse_xml
 from PIL import Image
-from playwright.async_api import Browser, Route
-from plexwebsocket import PlexWebsocket
+from plexwebsocket import SIGNAL_CONNECTION_STATE, STATE_CONNECTED, PlexWebsocket
 
 from dashy.dashboards import Dashboard
+from dashy.services.http_client import HttpClient
+from dashy.services.page_pool import PagePool
+from dashy.utils.render_now_playing import decode_image, render_now_playing
 
 if TYPE_CHECKING:
+    from playwright.async_api import Route
+
     from dashy.dashy import Dashy
-    from dashy.displays import Display
+    from dashy.utils.artwork_cache import Artwork
 
 logger = logging.getLogger(__name__)
 
+COALESCE_DELAY = 1.0
+METADATA_CACHE_TTL = 300.0
+RETRY_INTERVAL = 30.0
+
 DEFAULT_TEMPLATE = """
 <html>
     <head>
@@ -71,41 +80,85 @@ DEFAULT_TEMPLATE = """
 
 class PlexDashboard(Dashboard):
     dashy: Dashy
-    display: Display
+    item: Element
     session: aiohttp.ClientSession
-    browser: Browser
+    http: HttpClient
+    pages: PagePool
     ws: PlexWebsocket
     ws_task: asyncio.Task[None]
 
-    min_interval = None
-
-    def __init__(
+    def __init__(  # noqa: PLR0913
         self,
         *,
         server: str,
         token: str,
         user: Optional[str] = None,
         template: str = DEFAULT_TEMPLATE,
+        renderer: Literal["HTML", "NATIVE"] = "HTML",
+        font: Optional[str] = None,
+        background: Literal["FIT", "COVER"] = "COVER",
     ) -> None:
         self.server = server
         self.token = token
         self.user: Optional[str] = user
         self.template = template
+        self.renderer = renderer
+        self.font = font
+        self.background = background
         self.last_id: Optional[str] = None
+        self.playing: Optional[Element] = None
+        self.sessions: dict[str, Element] = {}
+        self.pending: dict[str, dict[str, Any]] = {}
+        self.full_refresh = True
+        self.flush_handle: Optional[asyncio.TimerHandle] = None
 
     async def start(self, dashy: Dashy) -> None:
         self.dashy = dashy
-        self.display = dashy.display
-        self.browser = await dashy.get_service(Browser)
+        if self.renderer == "HTML":
+            self.pages = await dashy.get_service(PagePool)
         self.session = await dashy.get_service(aiohttp.ClientSession)
+        self.http = await dashy.get_service(HttpClient)
 
         self.ws = PlexWebsocket(self, self.callback, session=self.session)
         self.ws_task = asyncio.create_task(self.ws.listen())
 
-    def callback(self, *_: str) -> None:
-        asyncio.get_event_loop().call_later(1.0, self.dashy.wakeup)
+    def callback(self, msgtype: str, data: Any, *_: Any) -> None:
+        if msgtype == SIGNAL_CONNECTION_STATE:
+            if data != STATE_CONNECTED:
+                return
+            self.full_refresh = True
+        elif msgtype == "playing":
+            for notification in data.get("PlaySessionStateNotification", []):
+                key = notification.get("sessionKey")
+                if key is not None:
+                    self.pending[str(key)] = notification
+        else:
+            return
+
+        if self.flush_handle is None:
+            self.flush_handle = asyncio.get_running_loop().call_later(
+                COALESCE_DELAY, self.flush
+            )
+
+    @property
+    def min_interval(self) -> Optional[float]:
+        return RETRY_INTERVAL if self.full_refresh else None
+
+    def flush(self) -> None:
+        self.flush_handle = None
+        self.dashy.wakeup(self)
+
+    @property
+    def required_services(self) -> list[type]:
+        services: list[type] = [aiohttp.ClientSession, HttpClient]
+        if self.renderer == "HTML":
+            services.append(PagePool)
+        return services
 
     async def stop(self) -> None:
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
         self.ws.close()
         await self.ws_task
 
@@ -118,32 +171,113 @@ class PlexDashboard(Dashboard):
     async def request(
         self,
         endpoint: str,
+        *,
+        cache_ttl: float = 0,
     ) -> Optional[Element]:
         try:
-            async with await self.session.request(
+            r = await self.http.request(
                 "GET",
                 self.url(endpoint),
                 headers={
                     "Accept": "application/xml",
                 },
-            ) as r:
-                body = await r.text()
-                if not r.ok:
-                    logger.error("Failed to contact plex: %s %s", r.status, body)
-                    return None
+                cache_ttl=cache_ttl,
+            )
+            body = r.text()
+            if not r.ok:
+                logger.error("Failed to contact plex: %s %s", r.status, body)
+                return None
 
-                return cast(Element, parse_xml(body))
+            return cast(Element, parse_xml(body))
         except Exception:
             logger.exception("Failed to contact Plex server:")
             return None
 
-    async def next(self, *, force: bool) -> Union[Literal["SKIP"], None, Image.Image]:
-        sessions = await self.request("/status/sessions")
+    async def refresh_sessions(self) -> bool:
+        self.full_refresh = False
+        queued, self.pending = self.pending, {}
+        try:
+            with self.dashy.metrics.timer("stage", dashboard=self.name, stage="fetch"):
+                sessions = await self.request("/status/sessions")
+        except BaseException:
+            self.full_refresh = True
+            self.pending = {**queued, **self.pending}
+            raise
         if sessions is None:
+            self.full_refresh = True
+            self.sessions = {}
+            return False
+
+        self.sessions = {
+            key: session
+            for session in sessions
+            if (key := session.get("sessionKey")) is not None
+        }
+        return True
+
+    async def fetch_metadata(
+        self, session: Element, rating_key: str
+    ) -> Optional[Element]:
+        with self.dashy.metrics.timer("stage", dashboard=self.name, stage="metadata"):
+            container = await self.request(
+                f"/library/metadata/{rating_key}", cache_ttl=METADATA_CACHE_TTL
+            )
+        if container is None or len(container) == 0:
+            return None
+
+        metadata = container[0]
+        metadata.set("sessionKey", session.get("sessionKey", ""))
+        for tag in ("Player", "User", "Session"):
+            child = session.find(tag)
+            if child is not None:
+                metadata.append(child)
+        return metadata
+
+    async def apply_notification(self, key: str, notification: dict[str, Any]) -> bool:
+        state = notification.get("state")
+        if state == "stopped":
+            self.sessions.pop(key, None)
+            return True
+
+        session = self.sessions.get(key)
+        if session is None:
+            return False
+
+        rating_key = str(notification.get("ratingKey", ""))
+        if rating_key and rating_key != session.get("ratingKey"):
+            metadata = await self.fetch_metadata(session, rating_key)
+            if metadata is None:
+                return False
+            self.sessions[key] = session = metadata
+
+        player = session.find("Player")
+        if player is not None and state is not None and state != "buffering":
+            player.set("state", state)
+        return True
+
+    async def apply_notifications(self) -> bool:
+        pending, self.pending = self.pending, {}
+        try:
+            while pending:
+                key = next(iter(pending))
+                if not await self.apply_notification(key, pending[key]):
+                    return False
+                del pending[key]
+        finally:
+            # Requeue whatever was not applied, e.g. when the probe times out;
+            # notifications that arrived meanwhile are newer and win.
+            self.pending = {**pending, **self.pending}
+        return True
+
+    async def probe(self) -> bool:
+        self.playing = None
+        if not self.full_refresh and not await self.apply_notifications():
+            self.full_refresh = True
+        if self.full_refresh and not await self.refresh_sessions():
             self.last_id = None
-            return "SKIP"
+            return False
 
-        for session in sessions:
+        for session in self.sessions.values():
             player = session.find("Player")
             user = session.find("User")
             if (
@@ -152,36 +286,59 @@ class PlexDashboard(Dashboard):
                 and user is not None
                 and user.get("title") == self.user
             ):
-                break
-        else:
-            self.last_id = None
+                self.playing = session
+                return True
+
+        self.last_id = None
+        return False
+
+    async def update(self) -> Union[Literal["SKIP"], bool]:
+        session = self.playing
+        if session is None:
             return "SKIP"
 
+        self.item = session
         guid = session.get("guid")
-        if force or guid != self.last_id:
-            image = await self.render_item(session)
-            self.last_id = guid
-            return image
-        return None
+        changed = guid != self.last_id
+        self.last_id = guid
+        return changed
+
+    async def render(self, resolution: tuple[int, int]) -> Image.Image:
+        return await self.render_item(self.item, resolution)
+
+    async def fetch_cover(self, session: Element) -> Optional[Artwork]:
+        art = session.get("art")
+        if art is None:
+            return None
+
+        with self.dashy.metrics.timer("stage", dashboard=self.name, stage="cover"):
+            return await self.dashy.artwork_cache.fetch(self.session, self.url(art))
 
     async def render_item(
         self,
         session: Element,
+        resolution: tuple[int, int],
     ) -> Image:
-        async def handle_cover(route: Route) -> None:
-            art = session.get("art")
-            if art is not None:
-                image_url = self.url(art)
-                async with self.session.get(image_url) as r:
-                    status = r.status
-                    data = await r.read()
-                    content_type = r.headers.get("content-type")
-
-                await route.fulfill(status=status, body=data, content_type=content_type)
-            else:
-                await route.fulfill(status=404)
+        frame_cache = self.dashy.frame_cache
+        cache_key = None
+        guid = session.get("guid")
+        if guid is not None:
+            template = (
+                self.template
+                if self.renderer == "HTML"
+                else f"NATIVE:{self.font}:{self.background}"
+            )
+            cache_key = frame_cache.key(self.name, guid, template, resolution)
+            image = await frame_cache.get(cache_key)
+            self.dashy.metrics.increment(
+                "frame_cache",
+                dashboard=self.name,
+                result="miss" if image is None else "hit",
+            )
+            if image is not None:
+                return image
 
-        title = session.get("title")
+        title = session.get("title") or ""
 
         series = None
         if session.get("type") == "episode":
@@ -194,19 +351,94 @@ class PlexDashboard(Dashboard):
                 else:
                     series = series_title
 
-        soup = BeautifulSoup(self.template, "html.parser")
-        soup.find(id="title").append(title)
-        if series:
-            soup.find(id="series").append(series)
+        if self.renderer == "NATIVE":
+            image, cacheable = await self.render_native(
+                session, title, series, resolution
+            )
         else:
-            soup.find(id="series").decompose()
+            image, cacheable = await self.render_html(
+                session, title, series, resolution
+            )
 
-        width, height = self.display.resolution
-        page = await self.browser.new_page(viewport={"width": width, "height": height})
+        if cache_key is not None and cacheable:
+            await frame_cache.put(cache_key, image)
+        return image
+
+    async def render_native(
+        self,
+        session: Element,
+        title: str,
+        series: Optional[str],
+        resolution: tuple[int, int],
+    ) -> tuple[Image.Image, bool]:
+        cover = None
+        cacheable = True
+        metrics = self.dashy.metrics
+        loop = asyncio.get_running_loop()
         try:
+            result = await self.fetch_cover(session)
+            if result is not None:
+                status, data, _ = result
+                cacheable = 200 <= status < 300
+                if cacheable:
+                    with metrics.timer("stage", dashboard=self.name, stage="decode"):
+                        cover = await loop.run_in_executor(None, decode_image, data)
+        except Exception:
+            logger.exception("Failed to load art:")
+            cacheable = False
+
+        with metrics.timer("stage", dashboard=self.name, stage="render"):
+            image = await loop.run_in_executor(
+                None,
+                partial(
+                    render_now_playing,
+                    resolution,
+                    cover=cover,
+                    title=title,
+                    subtitle=series,
+                    font=self.font,
+                    background=self.background,
+                ),
+            )
+        return image, cacheable
+
+    async def render_html(
+        self,
+        session: Element,
+        title: str,
+        series: Optional[str],
+        resolution: tuple[int, int],
+    ) -> tuple[Image.Image, bool]:
+        cacheable = True
+
+        async def handle_cover(route: Route) -> None:
+            nonlocal cacheable
+
+            result = await self.fetch_cover(session)
+            if result is None:
+                await route.fulfill(status=404)
+                return
+
+            status, data, content_type = result
+            cacheable = 200 <= status < 300
+            await route.fulfill(status=status, body=data, content_type=content_type)
+
+        metrics = self.dashy.metrics
+        with metrics.timer("stage", dashboard=self.name, stage="template"):
+            soup = BeautifulSoup(self.template, "html.parser")
+            soup.find(id="title").append(title)
+            if series:
+                soup.find(id="series").append(series)
+            else:
+                soup.find(id="series").decompose()
+            content = str(soup)
+
+        width, height = resolution
+        async with self.pages.page(width, height) as page:
             await page.route("http://localhost/cover.png", handle_cover)
-            await page.set_content(str(soup), wait_until="networkidle")
-            image_data = await page.screenshot()
-            return Image.open(BytesIO(image_data))
-        finally:
-            await page.close()
+            with metrics.timer("stage", dashboard=self.name, stage="set_content"):
+                await page.set_content(content, wait_until="networkidle")
+            with metrics.timer("stage", dashboard=self.name, stage="screenshot"):
+                image_data = await page.screenshot()
+
+        return Image.open(BytesIO(image_data)), cacheable
@@ -1,58 +1,116 @@
-import random
+from __future__ import annotations
+
+import asyncio
+import logging
 import time
+from contextlib import suppress
 from pathlib import Path
-from typing import Literal, Optional, Union
+from typing import TYPE_CHECKING, Literal, Optional, Union
 
 from PIL import Image
 
 from dashy.dashboards import Dashboard
-from dashy.dashy import Dashy
-from dashy.displays import Display
+from dashy.utils.photo_library import DEFAULT_POLL_INTERVAL, PhotoLibrary
 from dashy.utils.resize_image import resize_image
+from dashy.utils.thumbnail_cache import ThumbnailCache
+
+if TYPE_CHECKING:
+    from dashy.dashy import Dashy
+
+logger = logging.getLogger(__name__)
 
 DEFAULT_INTERVAL = 3600
 DEFAULT_PATH = Path.home() / "Pictures"
+DEFAULT_LOOKAHEAD = 1
+DEFAULT_PREFETCH_MEMORY = 16 * 1024 * 1024
+
+
+def load_image(
+    path: Path,
+    size: tuple[int, int],
+    mode: Literal["FIT", "COVER"],
+    thumbnails: Optional[ThumbnailCache],
+) -> Image.Image:
+    if thumbnails is not None:
+        return thumbnails.load(path, size, mode)
+
+    with Image.open(path) as im:
+        return resize_image(im, size, mode=mode)
+
+
+def discard_prefetch(future: asyncio.Future[Image.Image]) -> None:
+    # The job may already be running or done, so read its outcome rather than
+    # leaving a decode error unretrieved.
+    future.cancel()
+    future.add_done_callback(lambda f: f.cancelled() or f.exception())
 
 
 class SlideshowDashboard(Dashboard):
-    display: Display
+    dashy: Dashy
 
     last_update = None
 
-    def __init__(
+    def __init__(  # noqa: PLR0913
         self,
         *,
         path: Union[Path, str] = DEFAULT_PATH,
         interval: int = DEFAULT_INTERVAL,
         mode: Literal["FIT", "COVER"] = "FIT",
+        lookahead: int = DEFAULT_LOOKAHEAD,
+        prefetch_memory: int = DEFAULT_PREFETCH_MEMORY,
+        recursive: bool = True,
+        persist_index: bool = True,
+        poll_interval: Optional[float] = DEFAULT_POLL_INTERVAL,
+        thumbnails: Union[ThumbnailCache, bool] = True,
+        pregenerate: bool = False,
     ) -> None:
         if isinstance(path, str):
             path = Path(path).expanduser()
         self.interval = interval
         self.mode = mode
-
-        self.file_list = []
-
-        for file in path.iterdir():
-            if file.is_file():
-                try:
-                    im = Image.open(file)
-                    im.verify()
-                    im.close()
-                except Exception:
-                    continue
-                self.file_list.append(file)
-        random.shuffle(self.file_list)
+        self.lookahead = lookahead
+        self.prefetch_memory = prefetch_memory
+        self.thumbnails: Optional[ThumbnailCache] = (
+            (ThumbnailCache() if thumbnails else None)
+            if isinstance(thumbnails, bool)
+            else thumbnails
+        )
+        self.pregenerate = pregenerate
+        self.pregenerate_task: Optional[asyncio.Task[None]] = None
+
+        self.last_path: Optional[Path] = None
+        self.current: dict[tuple[int, int], tuple[Path, Image.Image]] = {}
+        self.prefetched: dict[
+            tuple[Path, tuple[int, int]], asyncio.Future[Image.Image]
+        ] = {}
+
+        self.library = PhotoLibrary(
+            path,
+            recursive=recursive,
+            persist_index=persist_index,
+            poll_interval=poll_interval,
+        )
 
     async def start(self, dashy: Dashy) -> None:
-        self.display = dashy.display
+        self.dashy = dashy
+        self.library.on_change = self.library_changed
+        await self.library.start()
 
     async def stop(self) -> None:
-        pass
+        await self.library.stop()
+        if self.pregenerate_task is not None:
+            self.pregenerate_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self.pregenerate_task
+            self.pregenerate_task = None
+        for future in self.prefetched.values():
+            discard_prefetch(future)
+        self.prefetched.clear()
+        self.current.clear()
 
     @property
     def min_interval(self) -> Optional[int]:
-        if len(self.file_list) < 2:
+        if len(self.library) < 2:
             return None
 
         if self.last_update is None:
@@ -60,19 +118,107 @@ class SlideshowDashboard(Dashboard):
 
         return max(0, self.interval - int(time.time() - self.last_update))
 
-    async def next(self, *, force: bool) -> Union[Literal["SKIP"], None, Image.Image]:
-        if not self.file_list:
+    def library_changed(self) -> None:
+        self.dashy.wakeup(self)
+
+        if (
+            self.pregenerate
+            and self.thumbnails is not None
+            and (self.pregenerate_task is None or self.pregenerate_task.done())
+        ):
+            self.pregenerate_task = asyncio.create_task(
+                self.pregenerate_thumbnails(self.thumbnails)
+            )
+
+    async def pregenerate_thumbnails(self, thumbnails: ThumbnailCache) -> None:
+        resolutions = self.dashy.resolutions(self)
+        frame_size = sum(width * height * 3 for width, height in resolutions)
+        budget = thumbnails.max_disk // max(frame_size, 1)
+        loop = asyncio.get_running_loop()
+        for path in self.library.peek(min(budget, len(self.library))):
+            for resolution in resolutions:
+                if thumbnails.contains(path, resolution, self.mode):
+                    continue
+                try:
+                    await loop.run_in_executor(
+                        None, thumbnails.load, path, resolution, self.mode
+                    )
+                except Exception:
+                    logger.exception("Failed to generate thumbnail for %s:", path)
+
+    @property
+    def prefetch_depth(self) -> int:
+        resolutions = self.dashy.resolutions(self)
+        frame_size = sum(width * height * 4 for width, height in resolutions)
+        return max(0, min(self.lookahead, self.prefetch_memory // max(frame_size, 1)))
+
+    def prefetch(self) -> None:
+        resolutions = self.dashy.resolutions(self)
+        upcoming = [
+            (path, resolution)
+            for path in self.library.peek(self.prefetch_depth)
+            for resolution in resolutions
+        ]
+        for key in list(self.prefetched):
+            if key not in upcoming:
+                discard_prefetch(self.prefetched.pop(key))
+
+        loop = asyncio.get_running_loop()
+        for path, resolution in upcoming:
+            if (path, resolution) not in self.prefetched:
+                self.prefetched[path, resolution] = loop.run_in_executor(
+                    None,
+                    load_image,
+                    path,
+                    resolution,
+                    self.mode,
+                    self.thumbnails,
+                )
+
+    async def prepare(self, path: Path, resolution: tuple[int, int]) -> Image.Image:
+        current = self.current.get(resolution)
+        if current is not None and current[0] == path:
+            return current[1]
+
+        future = self.prefetched.pop((path, resolution), None)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(
+                None,
+                load_image,
+                path,
+                resolution,
+                self.mode,
+                self.thumbnails,
+            )
+
+        image = await future
+        self.current[resolution] = (path, image)
+        return image
+
+    async def probe(self) -> bool:
+        return len(self.library) > 0
+
+    async def update(self) -> Union[Literal["SKIP"], bool]:
+        path = self.library.current()
+        if path is None:
             return "SKIP"
 
-        if force or self.min_interval == 0:
-            if self.min_interval == 0:
-                self.file_list.append(self.file_list.pop(0))
-                self.last_update = time.time()
+        if self.min_interval == 0:
+            path = self.library.advance() or path
+            self.last_update = time.time()
+
+        changed = path != self.last_path
+        self.last_path = path
+        return changed
 
-            im = Image.open(self.file_list[0])
-            try:
-                return resize_image(im, self.display.resolution, mode=self.mode)
-            finally:
-                im.close()
+    async def render(self, resolution: tuple[int, int]) -> Image.Image:
+        path = self.last_path
+        if path is None:
+            msg = "No photo selected"
+            raise RuntimeError(msg)
 
-        return None
+        try:
+            return await self.prepare(path, resolution)
+        finally:
+            self.prefetch()
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 import time
+from functools import partial
 from io import BytesIO
 from typing import TYPE_CHECKING, Any, Literal, Optional, Union, cast
 
@@ -11,16 +13,26 @@ import aiohttp
 from aiohttp import BasicAuth
 from bs4 import BeautifulSoup
 from PIL import Image
-from playwright.async_api import Browser, Route
 
 from dashy.dashboards import Dashboard
+from dashy.services.http_client import HttpClient
+from dashy.services.page_pool import PagePool
+from dashy.utils.artwork_cache import parse_http_date
+from dashy.utils.render_now_playing import decode_image, render_now_playing
 
 if TYPE_CHECKING:
+    from aiohttp.typedefs import LooseHeaders
+    from playwright.async_api import Route
+
     from dashy.dashy import Dashy
-    from dashy.displays import Display
+    from dashy.utils.artwork_cache import Artwork
 
 logger = logging.getLogger(__name__)
 
+BOUNDARY_MARGIN = 1.0
+API_URL = "https://api.spotify.com"
+ACCOUNTS_URL = "https://accounts.spotify.com"
+
 DEFAULT_TEMPLATE = """
 <html>
     <head>
@@ -69,25 +81,52 @@ DEFAULT_TEMPLATE = """
 """
 
 
+def get_retry_after(headers: Optional[LooseHeaders]) -> Optional[float]:
+    value = headers.get("Retry-After") if headers is not None else None
+    if value is None:
+        return None
+    if value.isdigit():
+        return float(value)
+    retry_at = parse_http_date(value)
+    return None if retry_at is None else max(retry_at - time.time(), 0)
+
+
 class SpotifyDashboard(Dashboard):
+    dashy: Dashy
     credentials: dict[str, Any]
-    display: Display
+    item: dict[str, Any]
     session: aiohttp.ClientSession
-    browser: Browser
+    http: HttpClient
+    pages: PagePool
 
-    min_interval = 1
-
-    def __init__(
+    def __init__(  # noqa: PLR0913
         self,
         *,
         credentials: str = "spotify-credentials.json",
-        interval: int = 1,
+        interval: float = 1,
+        max_interval: float = 15,
+        idle_interval: float = 60,
         template: str = DEFAULT_TEMPLATE,
+        renderer: Literal["HTML", "NATIVE"] = "HTML",
+        font: Optional[str] = None,
+        background: Literal["FIT", "COVER"] = "COVER",
+        api_url: str = API_URL,
+        accounts_url: str = ACCOUNTS_URL,
     ) -> None:
         self.credential_path = credentials
-        self.min_interval = interval
+        self.api_url = api_url
+        self.accounts_url = accounts_url
+        self.interval = interval
+        self.max_interval = max_interval
+        self.idle_interval = idle_interval
+        self.next_poll = 0.0
+        self.backoff_step = 0
         self.template = template
+        self.renderer = renderer
+        self.font = font
+        self.background = background
         self.last_id = None
+        self.playing: Optional[dict[str, Any]] = None
 
     async def start(self, dashy: Dashy) -> None:
         try:
@@ -97,17 +136,50 @@ class SpotifyDashboard(Dashboard):
             logger.exception("Invalid or missing spotify credentials")
             self.credentials = {}
 
-        self.display = dashy.display
+        self.dashy = dashy
         self.session = await dashy.get_service(aiohttp.ClientSession)
-        self.browser = await dashy.get_service(Browser)
+        self.http = await dashy.get_service(HttpClient)
+        if self.renderer == "HTML":
+            self.pages = await dashy.get_service(PagePool)
+
+    @property
+    def required_services(self) -> list[type]:
+        services: list[type] = [aiohttp.ClientSession, HttpClient]
+        if self.renderer == "HTML":
+            services.append(PagePool)
+        return services
 
     async def stop(self) -> None:
         pass
 
+    @property
+    def min_interval(self) -> float:
+        return max(self.next_poll - time.monotonic(), 0)
+
+    def poll_in(self, delay: float) -> None:
+        self.next_poll = time.monotonic() + delay
+
+    def backoff(self, retry_after: Optional[float] = None) -> None:
+        delay = min(self.interval * 2**self.backoff_step, self.idle_interval)
+        if delay < self.idle_interval:
+            self.backoff_step += 1
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        self.poll_in(delay)
+
+    def playing_delay(self, np: dict[str, Any]) -> float:
+        progress: Optional[int] = np.get("progress_ms")
+        duration: Optional[int] = (np.get("item") or {}).get("duration_ms")
+        if progress is None or not duration:
+            return self.interval
+        remaining = (duration - progress) / 1000 + BOUNDARY_MARGIN
+        return min(max(remaining, self.interval), self.max_interval)
+
     async def get_token(self) -> str:
         if self.credentials["expires"] < time.time():
-            async with self.session.post(
-                "https://accounts.spotify.com/api/token",
+            r = await self.http.request(
+                "POST",
+                f"{self.accounts_url}/api/token",
                 data={
                     "grant_type": "refresh_token",
                     "refresh_token": self.credentials["refresh_token"],
@@ -115,22 +187,20 @@ class SpotifyDashboard(Dashboard):
                 auth=BasicAuth(
                     self.credentials["client_id"], self.credentials["client_secret"]
                 ),
-            ) as r:
-                if not r.ok:
-                    error = await r.text()
-                    logger.error("Failed to refresh token: %s", error)
-                    self.credentials["access_token"] = ""
-                else:
-                    credentials = await r.json()
-                    self.credentials["expires"] = (
-                        time.time() + credentials["expires_in"]
-                    )
-                    self.credentials["access_token"] = credentials["access_token"]
-                    if "refresh_token" in credentials:
-                        self.credentials["refresh_token"] = credentials["refresh_token"]
-
-                async with aiofiles.open(self.credential_path, "w") as f:
-                    await f.write(json.dumps(self.credentials))
+                retry=True,
+            )
+            if not r.ok:
+                logger.error("Failed to refresh token: %s", r.text())
+                self.credentials["access_token"] = ""
+            else:
+                credentials = r.json()
+                self.credentials["expires"] = time.time() + credentials["expires_in"]
+                self.credentials["access_token"] = credentials["access_token"]
+                if "refresh_token" in credentials:
+                    self.credentials["refresh_token"] = credentials["refresh_token"]
+
+            async with aiofiles.open(self.credential_path, "w") as f:
+                await f.write(json.dumps(self.credentials))
 
         return cast(str, self.credentials["access_token"])
 
@@ -138,83 +208,195 @@ class SpotifyDashboard(Dashboard):
         self,
         method: str,
         path: str,
+        *,
+        cache_ttl: float = 0,
     ) -> Optional[dict[str, Any]]:
-        url = f"https://api.spotify.com{path}"
+        url = f"{self.api_url}{path}"
         token = await self.get_token()
         if not token:
             logger.error("No access token, aborting.")
             return None
 
-        async with await self.session.request(
+        r = await self.http.request(
             method,
             url,
             headers={
                 "Accept": "application/json",
                 "Authorization": f"Bearer {token}",
             },
-            raise_for_status=True,
-        ) as r:
-            if r.status == 204:
-                return None
-            return cast(dict[str, Any], await r.json())
+            cache_ttl=cache_ttl,
+        )
+        r.raise_for_status()
+        if r.status == 204:
+            return None
+        return cast(dict[str, Any], r.json())
 
-    async def next(self, *, force: bool) -> Union[Literal["SKIP"], None, Image.Image]:
+    async def probe(self) -> bool:
+        self.playing = None
+        self.poll_in(self.interval)
         if not self.credentials.get("access_token"):
-            return "SKIP"
+            self.backoff()
+            return False
+
+        try:
+            with self.dashy.metrics.timer("stage", dashboard=self.name, stage="fetch"):
+                np = await self.request(
+                    "GET",
+                    "/v1/me/player/currently-playing?additional_types=track,episode",
+                )
+        except aiohttp.ClientResponseError as e:
+            self.backoff(get_retry_after(e.headers))
+            raise
+        except Exception:
+            self.backoff()
+            raise
 
-        np = await self.request(
-            "GET", "/v1/me/player/currently-playing?additional_types=track,episode"
-        )
         if (
             np is not None
             and np["is_playing"]
             and np["currently_playing_type"] in ("track", "episode")
         ):
-            if force or np["item"]["id"] != self.last_id:
-                image = await self.render_item(np["item"])
-                self.last_id = np["item"]["id"]
-                return image
-            return None
+            self.playing = np["item"]
+            self.backoff_step = 0
+            self.poll_in(self.playing_delay(np))
+            return True
 
         self.last_id = None
-        return "SKIP"
+        self.backoff()
+        return False
+
+    async def update(self) -> Union[Literal["SKIP"], bool]:
+        item = self.playing
+        if item is None:
+            return "SKIP"
+
+        self.item = item
+        changed: bool = item["id"] != self.last_id
+        self.last_id = item["id"]
+        return changed
+
+    async def render(self, resolution: tuple[int, int]) -> Image.Image:
+        return await self.render_item(self.item, resolution)
+
+    def cover_url(self, item: dict[str, Any]) -> Optional[str]:
+        if item["type"] == "episode":
+            image_set = item["images"]
+        else:
+            image_set = item["album"]["images"]
+
+        if not image_set:
+            return None
+        return cast(str, image_set[0]["url"])
+
+    async def fetch_cover(self, item: dict[str, Any]) -> Optional[Artwork]:
+        url = self.cover_url(item)
+        if url is None:
+            return None
+
+        with self.dashy.metrics.timer("stage", dashboard=self.name, stage="cover"):
+            return await self.dashy.artwork_cache.fetch(self.session, url)
 
     async def render_item(
         self,
         item: dict[str, Any],
+        resolution: tuple[int, int],
     ) -> Image:
+        frame_cache = self.dashy.frame_cache
+        cache_key = None
+        if item.get("id"):
+            template = (
+                self.template
+                if self.renderer == "HTML"
+                else f"NATIVE:{self.font}:{self.background}"
+            )
+            cache_key = frame_cache.key(self.name, item["id"], template, resolution)
+            image = await frame_cache.get(cache_key)
+            self.dashy.metrics.increment(
+                "frame_cache",
+                dashboard=self.name,
+                result="miss" if image is None else "hit",
+            )
+            if image is not None:
+                return image
+
+        if item["type"] == "episode":
+            artist = item["show"]["name"]
+        else:
+            artist = ", ".join(artist["name"] for artist in item["artists"])
+
+        if self.renderer == "NATIVE":
+            image, cacheable = await self.render_native(item, artist, resolution)
+        else:
+            image, cacheable = await self.render_html(item, artist, resolution)
+
+        if cache_key is not None and cacheable:
+            await frame_cache.put(cache_key, image)
+        return image
+
+    async def render_native(
+        self, item: dict[str, Any], artist: str, resolution: tuple[int, int]
+    ) -> tuple[Image.Image, bool]:
+        cover = None
+        cacheable = True
+        metrics = self.dashy.metrics
+        loop = asyncio.get_running_loop()
+        try:
+            result = await self.fetch_cover(item)
+            if result is not None:
+                status, data, _ = result
+                cacheable = 200 <= status < 300
+                if cacheable:
+                    with metrics.timer("stage", dashboard=self.name, stage="decode"):
+                        cover = await loop.run_in_executor(None, decode_image, data)
+        except Exception:
+            logger.exception("Failed to load cover:")
+            cacheable = False
+
+        with metrics.timer("stage", dashboard=self.name, stage="render"):
+            image = await loop.run_in_executor(
+                None,
+                partial(
+                    render_now_playing,
+                    resolution,
+                    cover=cover,
+                    title=item["name"],
+                    subtitle=artist,
+                    font=self.font,
+                    background=self.background,
+                ),
+            )
+        return image, cacheable
+
+    async def render_html(
+        self, item: dict[str, Any], artist: str, resolution: tuple[int, int]
+    ) -> tuple[Image.Image, bool]:
+        cacheable = True
+
         async def handle_cover(route: Route) -> None:
-            if item["type"] == "episode":
-                image_set = item["images"]
-            else:
-                image_set = item["album"]["images"]
+            nonlocal cacheable
 
-            if not image_set:
+            result = await self.fetch_cover(item)
+            if result is None:
                 await route.fulfill(status=404)
                 return
 
-            async with self.session.get(image_set[0]["url"]) as r:
-                status = r.status
-                data = await r.read()
-                content_type = r.headers.get("content-type")
-
+            status, data, content_type = result
+            cacheable = 200 <= status < 300
             await route.fulfill(status=status, body=data, content_type=content_type)
 
-        if item["type"] == "episode":
-            artist = item["show"]["name"]
-        else:
-            artist = ", ".join(artist["name"] for artist in item["artists"])
-
-        soup = BeautifulSoup(self.template, "html.parser")
-        soup.find(id="title").append(item["name"])
-        soup.find(id="artist").append(artist)
+        metrics = self.dashy.metrics
+        with metrics.timer("stage", dashboard=self.name, stage="template"):
+            soup = BeautifulSoup(self.template, "html.parser")
+            soup.find(id="title").append(item["name"])
+            soup.find(id="artist").append(artist)
+            content = str(soup)
 
-        width, height = self.display.resolution
-        page = await self.browser.new_page(viewport={"width": width, "height": height})
-        try:
+        width, height = resolution
+        async with self.pages.page(width, height) as page:
             await page.route("http://localhost/cover.png", handle_cover)
-            await page.set_content(str(soup), wait_until="networkidle")
-            image_data = await page.screenshot()
-            return Image.open(BytesIO(image_data))
-        finally:
-            await page.close()
+            with metrics.timer("stage", dashboard=self.name, stage="set_content"):
+                await page.set_content(content, wait_until="networkidle")
+            with metrics.timer("stage", dashboard=self.name, stage="screenshot"):
+                image_data = await page.screenshot()
+
+        return Image.open(BytesIO(image_data)), cacheable
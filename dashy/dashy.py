@@ -1,109 +1,388 @@
 from __future__ import annotations
 
 import asyncio
+import logging
 import math
+import time
 from contextlib import suppress
-from typing import TYPE_CHECKING, Any, Optional, TypeVar, cast
-
-from aiohttp import ClientSession
-from playwright.async_api import Browser
+from typing import TYPE_CHECKING, Literal, NamedTuple, Optional, TypeVar, Union
 
 from dashy.displays.save_to_disk import SaveToDisk
-from dashy.services.aiohttp import AiohttpProvider
-from dashy.services.asyncpio import AsyncpioProvider
-from dashy.services.playwright import PlaywrightProvider
-from dashy.vendor import asyncpio
+from dashy.services import ServiceContainer, service_key
+from dashy.utils.artwork_cache import ArtworkCache
+from dashy.utils.frame_cache import FrameCache
+from dashy.utils.metrics import Metrics
+from dashy.utils.ownership import current_owner
 
 if TYPE_CHECKING:
+    from PIL import Image
+
     from dashy.dashboards import Dashboard
     from dashy.displays import Display
+    from dashy.utils.loop_watchdog import LoopWatchdog
+    from dashy.utils.profiler import SamplingProfiler
 
 T = TypeVar("T")
 
+logger = logging.getLogger(__name__)
+
 
-REGISTRY = {
-    Browser: PlaywrightProvider(),
-    ClientSession: AiohttpProvider(),
-    asyncpio.pi: AsyncpioProvider(),
-}
+class Tick(NamedTuple):
+    due: set[Dashboard]
+    updates: dict[Dashboard, Union[Literal["SKIP"], bool]]
+    frames: dict[tuple[Dashboard, tuple[int, int]], Optional[Image.Image]]
 
 
 class Dashy:
     def __init__(self) -> None:
-        self.display: Display = SaveToDisk()
-        self.sleep_task: Optional[asyncio.Task[None]] = None
-        self.last_dashboard: Optional[Dashboard] = None
+        self.displays: list[Display] = [SaveToDisk()]
+        self.layouts: dict[Display, list[Dashboard]] = {}
+        self.frame_cache = FrameCache()
+        self.artwork_cache = ArtworkCache()
+        self.metrics = Metrics()
+        self.watchdog: Optional[LoopWatchdog] = None
+        self.profiler: Optional[SamplingProfiler] = None
+        self.current_dashboard: Optional[Dashboard] = None
+        self.last_dashboards: dict[Display, Dashboard] = {}
         self.started_dashboards: set[Dashboard] = set()
+        self.updated_dashboards: set[Dashboard] = set()
         self.dashboards: list[Dashboard] = []
-        self.skip_sleep = False
-        self.services: dict[type, Any] = {}
+        self.deadlines: dict[Dashboard, float] = {}
+        self.ready: dict[Dashboard, bool] = {}
+        self.wakeup_event = asyncio.Event()
+        self.warmup = False
+        self.started_at: Optional[float] = None
+        self.services = ServiceContainer(self)
+
+    @property
+    def display(self) -> Display:
+        return self.displays[0]
+
+    @display.setter
+    def display(self, display: Display) -> None:
+        self.displays = [display]
+
+    def add_display(
+        self, display: Display, dashboards: Optional[list[Dashboard]] = None
+    ) -> None:
+        self.displays.append(display)
+        if dashboards is not None:
+            self.layouts[display] = dashboards
 
     async def get_service(self, t: type[T]) -> T:
-        service = self.services.get(t)
-        if service is None:
-            provider = REGISTRY[t]
-            service = await provider.start()
-            self.services[t] = service
-        return cast(T, service)
+        return await self.services.get(t)
+
+    def required_services(self) -> dict[str, type]:
+        required: dict[str, type] = {}
+        for display in self.displays:
+            required.update((service_key(t), t) for t in display.required_services)
+        for dashboard in self.all_dashboards():
+            required.update((service_key(t), t) for t in dashboard.required_services)
+        return required
+
+    async def warm_up(self) -> None:
+        started = time.monotonic()
+        required = self.required_services()
+        await self.services.start(list(required.values()))
+
+        dashboards = self.all_dashboards()
+        await asyncio.gather(
+            *(
+                self.start_dashboard(dashboard)
+                for dashboard in dashboards
+                if dashboard not in self.started_dashboards
+            )
+        )
+        logger.info(
+            "Warmed up %d services and %d dashboards in %.2fs",
+            len(required),
+            len(dashboards),
+            time.monotonic() - started,
+        )
+
+    async def start_dashboard(self, dashboard: Dashboard) -> None:
+        await dashboard.start(self)
+        self.started_dashboards.add(dashboard)
 
     async def run(self) -> None:
-        if self.display is None:
+        if not self.displays:
             msg = "No display were configured"
             raise RuntimeError(msg)
 
-        await self.display.start(self)
-        await self.render_loop(self.display)
+        await self.metrics.start()
+        if self.watchdog is not None:
+            await self.watchdog.start(self)
+        if self.profiler is not None:
+            await self.profiler.start(self)
+        self.started_at = time.monotonic()
+        displays = asyncio.gather(*(display.start(self) for display in self.displays))
+        if self.warmup:
+            await asyncio.gather(displays, self.warm_up())
+        else:
+            await displays
+        await self.render_loop()
 
     async def stop(self) -> None:
-        for dashboard in self.started_dashboards:
-            await dashboard.stop()
+        await asyncio.gather(
+            *(dashboard.stop() for dashboard in self.started_dashboards),
+            *(display.stop() for display in self.displays),
+        )
 
-        await self.display.stop()
+        await self.services.stop()
 
-        for t in self.services:
-            await REGISTRY[t].stop()
+        if self.profiler is not None:
+            await self.profiler.stop()
+        if self.watchdog is not None:
+            await self.watchdog.stop()
+        await self.metrics.stop()
 
-    async def render_loop(self, display: Display) -> None:
-        self.last_dashboard = None
+    async def render_loop(self) -> None:
+        self.last_dashboards.clear()
 
         while True:
-            pause_time = math.inf
+            await asyncio.gather(
+                *(
+                    self.start_dashboard(dashboard)
+                    for dashboard in self.all_dashboards()
+                    if dashboard not in self.started_dashboards
+                )
+            )
 
-            for dashboard in self.dashboards:
-                if dashboard not in self.started_dashboards:
-                    await dashboard.start(self)
-                    self.started_dashboards.add(dashboard)
+            now = time.monotonic()
+            due = [
+                dashboard
+                for dashboard in self.visible_dashboards()
+                if self.deadlines.get(dashboard, 0) <= now
+            ]
+            await self.probe(due)
+            await self.render(due)
 
-                result = await dashboard.next(
-                    force=self.last_dashboard is not dashboard
+            await self.sleep_until(self.next_deadline())
+
+    def dashboards_for(self, display: Display) -> list[Dashboard]:
+        return self.layouts.get(display, self.dashboards)
+
+    def all_dashboards(self) -> list[Dashboard]:
+        return list(
+            dict.fromkeys(
+                dashboard
+                for display in self.displays
+                for dashboard in self.dashboards_for(display)
+            )
+        )
+
+    def resolutions(self, dashboard: Dashboard) -> list[tuple[int, int]]:
+        return list(
+            dict.fromkeys(
+                display.resolution
+                for display in self.displays
+                if dashboard in self.dashboards_for(display)
+            )
+        )
+
+    def visible_dashboards(self, display: Optional[Display] = None) -> list[Dashboard]:
+        if display is None:
+            return list(
+                dict.fromkeys(
+                    dashboard
+                    for display in self.displays
+                    for dashboard in self.visible_dashboards(display)
+                )
+            )
+
+        dashboards = self.dashboards_for(display)
+        last_dashboard = self.last_dashboards.get(display)
+        if last_dashboard in dashboards:
+            return dashboards[: dashboards.index(last_dashboard) + 1]
+        return list(dashboards)
+
+    async def probe(self, dashboards: list[Dashboard]) -> None:
+        async def probe_dashboard(dashboard: Dashboard) -> None:
+            try:
+                with self.metrics.timer("probe", dashboard=dashboard.name):
+                    ready = await asyncio.wait_for(
+                        dashboard.probe(), dashboard.probe_timeout
+                    )
+            except asyncio.TimeoutError:
+                logger.warning("Timed out probing %s", dashboard.name)
+                self.metrics.increment(
+                    "probe_failures", dashboard=dashboard.name, reason="timeout"
+                )
+                ready = False
+            except Exception:
+                logger.exception("Failed to probe %s:", dashboard.name)
+                self.metrics.increment(
+                    "probe_failures", dashboard=dashboard.name, reason="error"
                 )
-                min_interval = dashboard.min_interval
-                if min_interval is not None:
-                    pause_time = min(pause_time, min_interval)
-
-                if result == "SKIP":
-                    continue
-
-                self.last_dashboard = dashboard
-                if result is not None:
-                    await display.show_image(result)
-                break
-            else:
-                self.last_dashboard = None
-
-            if not self.skip_sleep:
-                self.sleep_task = asyncio.create_task(asyncio.sleep(pause_time))
-                with suppress(asyncio.CancelledError):
-                    await self.sleep_task
-                self.sleep_task = None
-            else:
-                self.skip_sleep = False
-
-    def wakeup(self, *, force: bool = False) -> None:
+                ready = False
+
+            self.ready[dashboard] = ready
+            self.schedule(dashboard)
+
+        await asyncio.gather(*(probe_dashboard(dashboard) for dashboard in dashboards))
+
+    async def render(self, due: list[Dashboard]) -> None:
+        tick = Tick(set(due), {}, {})
+        shows = []
+        for display in self.displays:
+            visible = self.visible_dashboards(display)
+            choice = await self.choose(display, visible, tick)
+
+            hidden = [
+                dashboard
+                for dashboard in self.dashboards_for(display)
+                if dashboard not in visible
+            ]
+            if choice is None and hidden:
+                await self.probe(
+                    [dashboard for dashboard in hidden if dashboard not in tick.due]
+                )
+                tick.due.update(hidden)
+                choice = await self.choose(display, hidden, tick)
+
+            if choice is None:
+                self.last_dashboards.pop(display, None)
+                continue
+
+            dashboard, needs_frame = choice
+            if not needs_frame:
+                continue
+
+            image = await self.render_frame(dashboard, display.resolution, tick)
+            if image is None:
+                continue
+            self.last_dashboards[display] = dashboard
+            shows.append(self.show(display, dashboard, image))
+
+        await asyncio.gather(*shows)
+
+    async def choose(
+        self, display: Display, dashboards: list[Dashboard], tick: Tick
+    ) -> Optional[tuple[Dashboard, bool]]:
+        for dashboard in dashboards:
+            if not self.ready.get(dashboard, False):
+                continue
+
+            changed = await self.update(dashboard, tick)
+            if changed == "SKIP":
+                continue
+
+            return dashboard, (
+                changed or self.last_dashboards.get(display) is not dashboard
+            )
+        return None
+
+    async def update(
+        self, dashboard: Dashboard, tick: Tick
+    ) -> Union[Literal["SKIP"], bool]:
+        if dashboard in tick.updates:
+            return tick.updates[dashboard]
+        if dashboard not in tick.due and dashboard in self.updated_dashboards:
+            tick.updates[dashboard] = False
+            return False
+
+        self.current_dashboard = dashboard
+        token = current_owner.set(dashboard.name)
+        try:
+            with self.metrics.timer("update", dashboard=dashboard.name):
+                result = await dashboard.update()
+        except Exception:
+            logger.exception("Failed to update %s:", dashboard.name)
+            result = "SKIP"
+        finally:
+            current_owner.reset(token)
+            self.current_dashboard = None
+        self.schedule(dashboard)
+
+        if result == "SKIP":
+            self.ready[dashboard] = False
+            self.updated_dashboards.discard(dashboard)
+        else:
+            self.updated_dashboards.add(dashboard)
+        tick.updates[dashboard] = result
+        return result
+
+    async def render_frame(
+        self, dashboard: Dashboard, resolution: tuple[int, int], tick: Tick
+    ) -> Optional[Image.Image]:
+        key = (dashboard, resolution)
+        if key in tick.frames:
+            return tick.frames[key]
+
+        self.current_dashboard = dashboard
+        token = current_owner.set(dashboard.name)
+        try:
+            with self.metrics.timer("render", dashboard=dashboard.name):
+                image = await dashboard.render(resolution)
+        except Exception:
+            logger.exception("Failed to render %s:", dashboard.name)
+            self.ready[dashboard] = False
+            self.updated_dashboards.discard(dashboard)
+            image = None
+        finally:
+            current_owner.reset(token)
+            self.current_dashboard = None
+
+        tick.frames[key] = image
+        return image
+
+    async def show(
+        self, display: Display, dashboard: Dashboard, image: Image.Image
+    ) -> None:
+        self.metrics.increment("frames", dashboard=dashboard.name, display=display.name)
+        token = current_owner.set(dashboard.name)
+        try:
+            with self.metrics.timer(
+                "show", dashboard=dashboard.name, display=display.name
+            ):
+                await display.show_image(image)
+        except Exception:
+            logger.exception("Failed to show frame on %s:", display.name)
+            return
+        finally:
+            current_owner.reset(token)
+
+        if self.started_at is not None:
+            logger.info(
+                "First frame shown %.2fs after start",
+                time.monotonic() - self.started_at,
+            )
+            self.started_at = None
+
+    def schedule(self, dashboard: Dashboard) -> None:
+        min_interval = dashboard.min_interval
+        self.deadlines[dashboard] = (
+            math.inf if min_interval is None else time.monotonic() + min_interval
+        )
+
+    def next_deadline(self) -> float:
+        return min(
+            (
+                self.deadlines.get(dashboard, 0)
+                for dashboard in self.visible_dashboards()
+            ),
+            default=math.inf,
+        )
+
+    async def sleep_until(self, deadline: float) -> None:
+        timeout = deadline - time.monotonic()
+        if timeout > 0:
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(
+                    self.wakeup_event.wait(),
+                    None if math.isinf(timeout) else timeout,
+                )
+        self.wakeup_event.clear()
+
+    def wakeup(
+        self, dashboard: Optional[Dashboard] = None, *, force: bool = False
+    ) -> None:
         if force:
-            self.last_dashboard = None
+            self.last_dashboards.clear()
 
-        if self.sleep_task is not None:
-            self.sleep_task.cancel()
+        if dashboard is None:
+            self.deadlines.clear()
         else:
-            self.skip_sleep = True
+            self.deadlines[dashboard] = 0
+
+        self.wakeup_event.set()
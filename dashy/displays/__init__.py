@@ -10,12 +10,20 @@ if TYPE_CHECKING:
 
 
 class Display(abc.ABC):
+    @property
+    def name(self) -> str:
+        return type(self).__name__
+
     async def start(self, dashy: Dashy) -> None:  # noqa: B027
         pass
 
     async def stop(self) -> None:  # noqa: B027
         pass
 
+    @property
+    def required_services(self) -> list[type]:
+        return []
+
     @property
     @abc.abstractmethod
     def resolution(self) -> tuple[int, int]:
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+from contextlib import suppress
+from io import BytesIO
+from typing import TYPE_CHECKING, NamedTuple, Optional
+
+from aiohttp import web
+from PIL import Image
+
+from dashy.displays import Display
+from dashy.utils.dither import DitherMode, Palette, dither, get_executor
+
+if TYPE_CHECKING:
+    from dashy.dashy import Dashy
+
+logger = logging.getLogger(__name__)
+
+MAX_WAIT = 300.0
+COMPRESS_LEVEL = 1
+
+
+class Panel(NamedTuple):
+    palette: Palette
+    dither: DitherMode = "DIFFUSION"
+
+
+class Frame(NamedTuple):
+    etag: str
+    body: bytes
+
+
+def encode(image: Image) -> Frame:
+    f = BytesIO()
+    image.save(f, "PNG", compress_level=COMPRESS_LEVEL)
+    body = f.getvalue()
+    return Frame(f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"', body)
+
+
+def render_panel(image: Image, panel: Panel) -> Frame:
+    indices = dither(image, panel.palette, panel.dither)
+    frame = Image.fromarray(indices, "P")
+    frame.putpalette([channel for colour in panel.palette for channel in colour])
+    return encode(frame)
+
+
+class FrameServer(Display):
+    dashy: Dashy
+    updated: asyncio.Event
+
+    def __init__(
+        self,
+        *,
+        host: Optional[str] = None,
+        port: int = 8080,
+        resolution: tuple[int, int] = (800, 480),
+        panels: Optional[dict[str, Panel]] = None,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self._resolution = resolution
+        self.panels = panels or {}
+        self.frames: dict[str, Frame] = {}
+        self.runner: Optional[web.AppRunner] = None
+
+    @property
+    def resolution(self) -> tuple[int, int]:
+        return self._resolution
+
+    async def start(self, dashy: Dashy) -> None:
+        await super().start(dashy)
+        self.dashy = dashy
+        self.updated = asyncio.Event()
+        app = web.Application()
+        app.router.add_get("/frame.png", self.handle_frame)
+        app.router.add_get("/panels/{panel}.png", self.handle_frame)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, self.host, self.port).start()
+        logger.info("Serving frames on port %d", self.port)
+
+    async def stop(self) -> None:
+        await super().stop()
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
+
+    async def show_image(self, image: Image) -> None:
+        metrics = self.dashy.metrics
+        loop = asyncio.get_running_loop()
+        with metrics.timer("stage", display=self.name, stage="encode"):
+            frame = await loop.run_in_executor(None, encode, image)
+        previous = self.frames.get("")
+        if previous is not None and previous.etag == frame.etag:
+            metrics.increment("panel_refreshes", display=self.name, result="skipped")
+            return
+
+        frames = {"": frame}
+        with metrics.timer("stage", display=self.name, stage="dither"):
+            for name, panel in self.panels.items():
+                frames[name] = await loop.run_in_executor(
+                    get_executor(), render_panel, image, panel
+                )
+
+        self.frames = frames
+        self.updated.set()
+        self.updated = asyncio.Event()
+        metrics.increment("panel_refreshes", display=self.name, result="refreshed")
+
+    async def handle_frame(self, request: web.Request) -> web.Response:
+        name = request.match_info.get("panel", "")
+        if name and name not in self.panels:
+            raise web.HTTPNotFound
+        label = name or "raw"
+
+        try:
+            wait = min(float(request.query.get("wait", 0)), MAX_WAIT)
+        except ValueError:
+            raise web.HTTPBadRequest(text="Invalid wait") from None
+
+        etag = request.headers.get("If-None-Match")
+        frame = self.frames.get(name)
+        if wait > 0 and (frame is None or frame.etag == etag):
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self.updated.wait(), wait)
+            frame = self.frames.get(name)
+
+        if frame is None:
+            self.dashy.metrics.increment("frame_requests", panel=label, result="empty")
+            return web.Response(status=204)
+
+        headers = {"ETag": frame.etag, "Cache-Control": "no-cache"}
+        if frame.etag == etag:
+            self.dashy.metrics.increment(
+                "frame_requests", panel=label, result="not_modified"
+            )
+            return web.Response(status=304, headers=headers)
+
+        self.dashy.metrics.increment("frame_requests", panel=label, result="sent")
+        return web.Response(body=frame.body, content_type="image/png", headers=headers)
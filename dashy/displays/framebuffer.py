@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import asyncio
+import fcntl
+import mmap
+import os
+import struct
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Literal, NamedTuple, Optional, Union, cast
+
+import numpy as np
+
+from dashy.displays import Display
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+    from dashy.dashy import Dashy
+
+PixelFormat = Literal["RGB888", "XRGB8888", "RGB565"]
+
+BYTES_PER_PIXEL: dict[PixelFormat, int] = {
+    "RGB888": 3,
+    "XRGB8888": 4,
+    "RGB565": 2,
+}
+# DRM fourccs name pixels as little-endian words, so RG24 and XR24 are stored
+# as B, G, R (, X) bytes, which also matches 24/32 bpp fbdev devices.
+FOURCC: dict[PixelFormat, bytes] = {
+    "RGB888": b"RG24",
+    "XRGB8888": b"XR24",
+    "RGB565": b"RG16",
+}
+
+# magic, version, header size, width, height, fourcc, stride, sequence, timestamp
+# The sequence number is odd while a frame is being written, so readers should
+# retry when it is odd or changed while they were copying the pixels.
+HEADER = struct.Struct("<4sHHHH4sIQd")
+MAGIC = b"DASH"
+VERSION = 1
+SEQUENCE_OFFSET = HEADER.size - 16
+
+# Leading fields of fb_var_screeninfo and fb_fix_screeninfo from linux/fb.h:
+# xres, yres, xres_virtual, yres_virtual, xoffset, yoffset, bits_per_pixel and
+# id, smem_start, smem_len, type, type_aux, visual, x/ypanstep, ywrapstep,
+# line_length. The fix struct uses native alignment for its unsigned long.
+FBIOGET_VSCREENINFO = 0x4600
+FBIOGET_FSCREENINFO = 0x4602
+VAR_SCREENINFO = struct.Struct("=7I")
+FIX_SCREENINFO = struct.Struct("@16sLIIIIHHHI")
+SCREENINFO_SIZE = 160
+
+
+def convert(image: Image, pixel_format: PixelFormat) -> bytes:
+    if pixel_format == "RGB888":
+        return cast(bytes, image.convert("RGB").tobytes("raw", "BGR"))
+    if pixel_format == "XRGB8888":
+        return cast(bytes, image.convert("RGB").tobytes("raw", "BGRX"))
+
+    pixels = np.asarray(image.convert("RGB"), dtype=np.uint16)
+    packed = (
+        ((pixels[..., 0] >> 3) << 11)
+        | ((pixels[..., 1] >> 2) << 5)
+        | (pixels[..., 2] >> 3)
+    )
+    return packed.astype("<u2").tobytes()
+
+
+class DeviceInfo(NamedTuple):
+    resolution: tuple[int, int]
+    pixel_format: PixelFormat
+    stride: int
+    offset: int
+
+
+def probe_device(path: Path) -> DeviceInfo:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        var = fcntl.ioctl(fd, FBIOGET_VSCREENINFO, bytes(SCREENINFO_SIZE))
+        fix = fcntl.ioctl(fd, FBIOGET_FSCREENINFO, bytes(SCREENINFO_SIZE))
+    finally:
+        os.close(fd)
+
+    (
+        width,
+        height,
+        _,
+        _,
+        x_offset,
+        y_offset,
+        bits_per_pixel,
+    ) = VAR_SCREENINFO.unpack_from(var)
+    stride = FIX_SCREENINFO.unpack_from(fix)[-1]
+    formats: dict[int, PixelFormat] = {16: "RGB565", 24: "RGB888", 32: "XRGB8888"}
+    pixel_format = formats[bits_per_pixel]
+    offset = y_offset * stride + x_offset * BYTES_PER_PIXEL[pixel_format]
+    return DeviceInfo((width, height), pixel_format, stride, offset)
+
+
+class Framebuffer(Display):
+    dashy: Dashy
+
+    def __init__(
+        self,
+        path: Union[Path, str] = "dashy.fb",
+        *,
+        resolution: Optional[tuple[int, int]] = None,
+        pixel_format: Optional[PixelFormat] = None,
+    ) -> None:
+        if isinstance(path, str):
+            path = Path(path).expanduser()
+        self.path = path
+        self.device = path.is_char_device()
+        info = probe_device(path) if self.device else None
+        if info is not None:
+            resolution = resolution or info.resolution
+            pixel_format = pixel_format or info.pixel_format
+        self._resolution = resolution or (800, 480)
+        self.pixel_format: PixelFormat = pixel_format or "RGB888"
+        self.row_size = self._resolution[0] * BYTES_PER_PIXEL[self.pixel_format]
+        self.stride = self.row_size if info is None else info.stride
+        self.offset = HEADER.size if info is None else info.offset
+        if self.row_size > self.stride:
+            msg = f"{self._resolution[0]} pixels do not fit the {self.stride}B stride"
+            raise ValueError(msg)
+        self.sequence = 0
+        self.fd: Optional[int] = None
+        self.buffer: Optional[mmap.mmap] = None
+
+    @property
+    def resolution(self) -> tuple[int, int]:
+        return self._resolution
+
+    async def start(self, dashy: Dashy) -> None:
+        await super().start(dashy)
+        self.dashy = dashy
+        size = self.offset + self.stride * self._resolution[1]
+        if not self.device:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if not self.device:
+            os.ftruncate(self.fd, size)
+        self.buffer = mmap.mmap(self.fd, size)
+        self.write_header()
+
+    async def stop(self) -> None:
+        await super().stop()
+        if self.buffer is not None:
+            self.buffer.close()
+            self.buffer = None
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def write_header(self) -> None:
+        if self.device or self.buffer is None:
+            return
+        width, height = self._resolution
+        HEADER.pack_into(
+            self.buffer,
+            0,
+            MAGIC,
+            VERSION,
+            HEADER.size,
+            width,
+            height,
+            FOURCC[self.pixel_format],
+            self.stride,
+            self.sequence,
+            time.time(),
+        )
+
+    def write(self, image: Image) -> None:
+        if self.buffer is None:
+            return
+        if image.size != self._resolution:
+            image = image.resize(self._resolution)
+        data = convert(image, self.pixel_format)
+
+        self.sequence += 1
+        if not self.device:
+            struct.pack_into("<Q", self.buffer, SEQUENCE_OFFSET, self.sequence)
+        if self.stride == self.row_size:
+            self.buffer[self.offset : self.offset + len(data)] = data
+        else:
+            height = self._resolution[1]
+            rows = np.frombuffer(
+                self.buffer, np.uint8, height * self.stride, self.offset
+            ).reshape(height, self.stride)
+            rows[:, : self.row_size] = np.frombuffer(data, np.uint8).reshape(
+                height, self.row_size
+            )
+            del rows
+        self.sequence += 1
+        self.write_header()
+
+    async def show_image(self, image: Image) -> None:
+        loop = asyncio.get_running_loop()
+        with self.dashy.metrics.timer("stage", display=self.name, stage="write"):
+            await loop.run_in_executor(None, self.write, image)
+        self.dashy.metrics.increment(
+            "panel_refreshes", display=self.name, result="refreshed"
+        )
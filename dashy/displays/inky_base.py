@@ -1,19 +1,36 @@
 from __future__ import annotations
 
 import asyncio
-from typing import TYPE_CHECKING, Literal, Protocol, Union
+import hashlib
+import logging
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Literal, Optional, Protocol, Union
+
+from PIL import Image
 
 from dashy.displays import Display
+from dashy.utils.dither import DitherMode, Palette, dither, get_executor
 
 if TYPE_CHECKING:
-    from PIL import Image
-
     from dashy.dashy import Dashy
     from dashy.sensors.gpio_button import GPIOButton
 
+logger = logging.getLogger(__name__)
+
+DEFAULT_FINGERPRINT_PATH = Path.home() / ".cache" / "dashy" / "inky-fingerprint"
+
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+MONO_PALETTES: dict[str, Palette] = {
+    "black": [WHITE, BLACK],
+    "red": [WHITE, BLACK, (255, 0, 0)],
+    "yellow": [WHITE, BLACK, (255, 255, 0)],
+}
+
 
 class InkyBaseDisplay(Protocol):
     resolution: tuple[int, int]
+    buf: Any
 
     def show(self) -> None:
         ...
@@ -32,39 +49,101 @@ class InkyColourDisplay(InkyBaseDisplay):
     def set_image(self, image: Image, saturation: float = 0.5) -> None:
         ...
 
+    _palette_blend: Callable[[float], list[int]]
+
 
 InkyDisplay = Union[InkyMonoDisplay, InkyColourDisplay]
 
 
 class InkyBase(Display):
+    dashy: Dashy
     buttons: dict[str, GPIOButton]
 
-    def __init__(self, device: InkyDisplay, *, saturation: float = 0.75) -> None:
+    def __init__(
+        self,
+        device: InkyDisplay,
+        *,
+        saturation: float = 0.75,
+        fingerprint: Union[Path, str, None] = DEFAULT_FINGERPRINT_PATH,
+        dither: DitherMode = "DIFFUSION",
+    ) -> None:
+        if isinstance(fingerprint, str):
+            fingerprint = Path(fingerprint).expanduser()
         self.device = device
         self.buttons = {}
         self.saturation = saturation
+        self.dither = dither
+        self.fingerprint_path: Optional[Path] = fingerprint
+        self.fingerprint: Optional[str] = None
 
     async def start(self, dashy: Dashy) -> None:
         await super().start(dashy)
-        for button in self.buttons.values():
-            await button.start(dashy)
+        self.dashy = dashy
+        if self.fingerprint_path is not None:
+            try:
+                self.fingerprint = self.fingerprint_path.read_text().strip()
+            except OSError:
+                self.fingerprint = None
+        await asyncio.gather(*(button.start(dashy) for button in self.buttons.values()))
 
     async def stop(self) -> None:
         await super().stop()
-        for button in self.buttons.values():
-            await button.stop()
+        await asyncio.gather(*(button.stop() for button in self.buttons.values()))
+
+    @property
+    def required_services(self) -> list[type]:
+        return [
+            service
+            for button in self.buttons.values()
+            for service in button.required_services
+        ]
 
     @property
     def resolution(self) -> tuple[int, int]:
         return self.device.resolution
 
-    async def show_image(self, image: Image) -> None:
-        def render_image() -> None:
-            if self.device.colour == "multi":
-                self.device.set_image(image, saturation=self.saturation)
-            else:
-                self.device.set_image(image)
-            self.device.show()
+    def store_fingerprint(self, fingerprint: str) -> None:
+        self.fingerprint = fingerprint
+        if self.fingerprint_path is None:
+            return
+
+        try:
+            self.fingerprint_path.parent.mkdir(parents=True, exist_ok=True)
+            self.fingerprint_path.write_text(fingerprint)
+        except OSError:
+            logger.exception("Failed to persist panel fingerprint:")
+
+    def palette(self) -> Palette:
+        if self.device.colour == "multi":
+            blend = self.device._palette_blend(self.saturation)  # noqa: SLF001
+            return [
+                (blend[i], blend[i + 1], blend[i + 2]) for i in range(0, len(blend), 3)
+            ]
+        return MONO_PALETTES[self.device.colour]
 
+    async def show_image(self, image: Image) -> None:
+        metrics = self.dashy.metrics
         loop = asyncio.get_event_loop()
-        await loop.run_in_executor(None, render_image)
+        with metrics.timer("stage", display=self.name, stage="dither"):
+            indices = await loop.run_in_executor(
+                get_executor(), dither, image, self.palette(), self.dither
+            )
+        frame = Image.fromarray(indices, "P")
+
+        def prepare_image() -> str:
+            self.device.set_image(frame)
+            return hashlib.blake2b(
+                self.device.buf.tobytes(), digest_size=16
+            ).hexdigest()
+
+        with metrics.timer("stage", display=self.name, stage="set_image"):
+            fingerprint = await loop.run_in_executor(None, prepare_image)
+        if fingerprint == self.fingerprint:
+            logger.debug("Frame unchanged, skipping panel refresh")
+            metrics.increment("panel_refreshes", display=self.name, result="skipped")
+            return
+
+        with metrics.timer("stage", display=self.name, stage="refresh"):
+            await loop.run_in_executor(None, self.device.show)
+        metrics.increment("panel_refreshes", display=self.name, result="refreshed")
+        await loop.run_in_executor(None, self.store_fingerprint, fingerprint)
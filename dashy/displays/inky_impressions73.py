@@ -1,12 +1,24 @@
+from pathlib import Path
+from typing import Union
+
 from inky.inky_ac073tc1a import Inky
 
-from dashy.displays.inky_base import InkyBase
+from dashy.displays.inky_base import DEFAULT_FINGERPRINT_PATH, InkyBase
 from dashy.sensors.gpio_button import GPIOButton
+from dashy.utils.dither import DitherMode
 
 
 class Impressions73(InkyBase):
-    def __init__(self, *, saturation: float = 0.75) -> None:
-        super().__init__(Inky(), saturation=saturation)
+    def __init__(
+        self,
+        *,
+        saturation: float = 0.75,
+        fingerprint: Union[Path, str, None] = DEFAULT_FINGERPRINT_PATH,
+        dither: DitherMode = "DIFFUSION",
+    ) -> None:
+        super().__init__(
+            Inky(), saturation=saturation, fingerprint=fingerprint, dither=dither
+        )
 
         self.buttons = {
             "A": GPIOButton(5),
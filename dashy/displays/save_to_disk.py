@@ -1,10 +1,99 @@
-from PIL import Image
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+from collections import deque
+from datetime import datetime, timezone
+from io import BytesIO
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Optional, Union
 
 from dashy.displays import Display
+from dashy.utils.disk_cache import write_atomic
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+    from dashy.dashy import Dashy
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COMPRESS_LEVEL = 1
+OPAQUE_FORMATS = {"JPEG", "PPM"}
 
 
 class SaveToDisk(Display):
+    dashy: Dashy
     resolution = (800, 480)
 
+    def __init__(  # noqa: PLR0913
+        self,
+        path: Union[Path, str] = "screenshot.png",
+        *,
+        image_format: str = "PNG",
+        compress_level: int = DEFAULT_COMPRESS_LEVEL,
+        history: int = 0,
+        history_path: Union[Path, str, None] = None,
+    ) -> None:
+        if isinstance(path, str):
+            path = Path(path).expanduser()
+        if isinstance(history_path, str):
+            history_path = Path(history_path).expanduser()
+        self.path = path
+        self.image_format = image_format
+        self.compress_level = compress_level
+        self.history_size = history
+        self.history_path = history_path or path.parent / "history"
+        self.history: deque[Path] = deque()
+        self.fingerprint: Optional[str] = None
+
+    async def start(self, dashy: Dashy) -> None:
+        await super().start(dashy)
+        self.dashy = dashy
+        if self.history_size and self.history_path.is_dir():
+            self.history.extend(sorted(self.history_path.glob(f"*{self.path.suffix}")))
+
+    def encode(self, image: Image) -> Optional[tuple[str, bytes]]:
+        fingerprint = hashlib.blake2b(image.tobytes(), digest_size=16).hexdigest()
+        if fingerprint == self.fingerprint:
+            return None
+
+        options: dict[str, Any] = {}
+        if self.image_format == "PNG":
+            options["compress_level"] = self.compress_level
+        if self.image_format in OPAQUE_FORMATS and image.mode != "RGB":
+            image = image.convert("RGB")
+        f = BytesIO()
+        image.save(f, self.image_format, **options)
+        return fingerprint, f.getvalue()
+
+    def write(self, data: bytes, dashboard: str) -> None:
+        write_atomic(self.path, data)
+        if not self.history_size:
+            return
+
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+        filename = self.history_path / f"{stamp}-{dashboard}{self.path.suffix}"
+        write_atomic(filename, data)
+        self.history.append(filename)
+        while len(self.history) > self.history_size:
+            self.history.popleft().unlink(missing_ok=True)
+
     async def show_image(self, image: Image) -> None:
-        image.save("screenshot.png", "PNG")
+        metrics = self.dashy.metrics
+        loop = asyncio.get_running_loop()
+        with metrics.timer("stage", display=self.name, stage="encode"):
+            encoded = await loop.run_in_executor(None, self.encode, image)
+        if encoded is None:
+            logger.debug("Frame unchanged, skipping write")
+            metrics.increment("panel_refreshes", display=self.name, result="skipped")
+            return
+
+        fingerprint, data = encoded
+        shown = self.dashy.last_dashboards.get(self)
+        dashboard = "unknown" if shown is None else shown.name
+        with metrics.timer("stage", display=self.name, stage="write"):
+            await loop.run_in_executor(None, self.write, data, dashboard)
+        self.fingerprint = fingerprint
+        metrics.increment("panel_refreshes", display=self.name, result="refreshed")
@@ -20,11 +20,19 @@ class GPIOButton(Button):
         self.cancel: Optional[Callable[[], Awaitable[None]]] = None
         self.callbacks: list[ButtonCallback] = []
 
+    @property
+    def required_services(self) -> list[type]:
+        return [asyncpio.pi]
+
     async def start(self, dashy: Dashy) -> None:
         pi = await dashy.get_service(asyncpio.pi)
 
-        await pi.set_mode(self.gpio, asyncpio.INPUT)
-        await pi.set_pull_up_down(self.gpio, asyncpio.PUD_UP)
+        await pi.batch(
+            [
+                pi.set_mode(self.gpio, asyncpio.INPUT),
+                pi.set_pull_up_down(self.gpio, asyncpio.PUD_UP),
+            ]
+        )
         callback = await pi.callback(
             self.gpio,
             edge=asyncpio.RISING_EDGE,
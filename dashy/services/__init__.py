@@ -1,16 +1,157 @@
 from __future__ import annotations
 
+import asyncio
+import importlib
+import logging
+import time
 from abc import ABCMeta, abstractmethod
-from typing import Generic, TypeVar
+from typing import TYPE_CHECKING, Any, Generic, TypeVar, Union, cast
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    from dashy.dashy import Dashy
 
 T = TypeVar("T")
 
+logger = logging.getLogger(__name__)
+
+# Third-party types are keyed by their public re-export, not the private
+# module they happen to be defined in.
+ALIASES = {
+    "playwright.async_api._generated.Browser": "playwright.async_api.Browser",
+    "aiohttp.client.ClientSession": "aiohttp.ClientSession",
+}
+
+REGISTRY = {
+    "playwright.async_api.Browser": "dashy.services.playwright:PlaywrightProvider",
+    "dashy.services.page_pool.PagePool": "dashy.services.playwright:PagePoolProvider",
+    "aiohttp.ClientSession": "dashy.services.aiohttp:AiohttpProvider",
+    "dashy.services.http_client.HttpClient": (
+        "dashy.services.http_client:HttpClientProvider"
+    ),
+    "dashy.vendor.asyncpio.pi": "dashy.services.asyncpio:AsyncpioProvider",
+}
+
 
 class ServiceProvider(Generic[T], metaclass=ABCMeta):
+    dependencies: Sequence[type] = ()
+
     @abstractmethod
-    async def start(self) -> T:
+    async def start(self, dashy: Dashy) -> T:
         ...
 
     @abstractmethod
     async def stop(self) -> None:
         ...
+
+
+def service_key(t: Union[type, str]) -> str:
+    key = t if isinstance(t, str) else f"{t.__module__}.{t.__qualname__}"
+    return ALIASES.get(key, key)
+
+
+def check_registry() -> list[str]:
+    errors = []
+    for key in REGISTRY:
+        module_name, _, name = key.rpartition(".")
+        try:
+            t = getattr(importlib.import_module(module_name), name)
+        except (ImportError, AttributeError) as e:
+            errors.append(f"{key}: {e}")
+            continue
+        if service_key(t) != key:
+            errors.append(f"{key}: resolves to {service_key(t)}")
+    return errors
+
+
+def load_provider(path: str) -> ServiceProvider[Any]:
+    module_name, _, class_name = path.partition(":")
+    provider: ServiceProvider[Any] = getattr(
+        importlib.import_module(module_name), class_name
+    )()
+    return provider
+
+
+class ServiceContainer:
+    def __init__(self, dashy: Dashy) -> None:
+        self.dashy = dashy
+        self.registry: dict[str, Union[str, ServiceProvider[Any]]] = dict(REGISTRY)
+        self.providers: dict[str, ServiceProvider[Any]] = {}
+        self.services: dict[str, Any] = {}
+        self.starting: dict[str, asyncio.Task[Any]] = {}
+
+    def register(
+        self, t: Union[type, str], provider: Union[str, ServiceProvider[Any]]
+    ) -> None:
+        key = service_key(t)
+        if key in self.services or key in self.starting:
+            msg = f"Service {key} has already been started"
+            raise RuntimeError(msg)
+        self.registry[key] = provider
+
+    def __contains__(self, t: Union[type, str]) -> bool:
+        return service_key(t) in self.services
+
+    async def get(self, t: type[T]) -> T:
+        key = service_key(t)
+        if key in self.services:
+            return cast(T, self.services[key])
+
+        task = self.starting.get(key)
+        if task is None:
+            task = self.starting[key] = asyncio.create_task(self.start_service(key))
+        return cast(T, await asyncio.shield(task))
+
+    async def resolve(self, key: str) -> ServiceProvider[Any]:
+        provider = self.registry[key]
+        if isinstance(provider, str):
+            loop = asyncio.get_running_loop()
+            provider = await loop.run_in_executor(None, load_provider, provider)
+        return provider
+
+    async def start_service(self, key: str) -> Any:
+        try:
+            started = time.monotonic()
+            provider = await self.resolve(key)
+            await asyncio.gather(*(self.get(t) for t in provider.dependencies))
+            with self.dashy.metrics.timer("service_start", service=key):
+                service = await provider.start(self.dashy)
+            logger.info("Started service %s in %.2fs", key, time.monotonic() - started)
+            self.providers[key] = provider
+            self.services[key] = service
+            return service
+        finally:
+            del self.starting[key]
+
+    async def start(self, services: Sequence[type]) -> None:
+        results = await asyncio.gather(
+            *(self.get(t) for t in services), return_exceptions=True
+        )
+        for t, result in zip(services, results):
+            if isinstance(result, Exception):
+                logger.error("Failed to start %s: %s", service_key(t), result)
+
+    async def stop(self) -> None:
+        if self.starting:
+            await asyncio.gather(*self.starting.values(), return_exceptions=True)
+
+        while self.services:
+            required = {
+                service_key(dependency)
+                for key in self.services
+                for dependency in self.providers[key].dependencies
+            }
+            batch = [key for key in self.services if key not in required]
+            if not batch:
+                batch = list(self.services)
+
+            results = await asyncio.gather(
+                *(self.providers[key].stop() for key in batch),
+                return_exceptions=True,
+            )
+            for key, result in zip(batch, results):
+                if isinstance(result, Exception):
+                    logger.error("Failed to stop %s: %s", key, result)
+                del self.services[key]
+                del self.providers[key]
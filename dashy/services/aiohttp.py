@@ -1,13 +1,52 @@
-from aiohttp import ClientSession
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Optional
+
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
 
 from dashy.services import ServiceProvider
 
+if TYPE_CHECKING:
+    from dashy.dashy import Dashy
+
+DEFAULT_LIMIT = 32
+DEFAULT_LIMIT_PER_HOST = 8
+DEFAULT_DNS_CACHE_TTL = 300
+DEFAULT_KEEPALIVE_TIMEOUT = 60.0
+DEFAULT_CONNECT_TIMEOUT = 10.0
+DEFAULT_READ_TIMEOUT = 30.0
+
 
 class AiohttpProvider(ServiceProvider[ClientSession]):
     session: ClientSession
 
-    async def start(self) -> ClientSession:
-        self.session = ClientSession()
+    def __init__(  # noqa: PLR0913
+        self,
+        *,
+        limit: int = DEFAULT_LIMIT,
+        limit_per_host: int = DEFAULT_LIMIT_PER_HOST,
+        dns_cache_ttl: Optional[int] = DEFAULT_DNS_CACHE_TTL,
+        keepalive_timeout: float = DEFAULT_KEEPALIVE_TIMEOUT,
+        connect_timeout: Optional[float] = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: Optional[float] = DEFAULT_READ_TIMEOUT,
+        total_timeout: Optional[float] = None,
+    ) -> None:
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = ClientTimeout(
+            total=total_timeout, sock_connect=connect_timeout, sock_read=read_timeout
+        )
+
+    async def start(self, _: Dashy) -> ClientSession:
+        connector = TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            ttl_dns_cache=self.dns_cache_ttl,
+            keepalive_timeout=self.keepalive_timeout,
+        )
+        self.session = ClientSession(connector=connector, timeout=self.timeout)
         return self.session
 
     async def stop(self) -> None:
@@ -1,13 +1,35 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Optional, Union
+
 from dashy.services import ServiceProvider
 from dashy.vendor import asyncpio
 
+if TYPE_CHECKING:
+    from dashy.dashy import Dashy
+
 
 class AsyncpioProvider(ServiceProvider[asyncpio.pi]):
     pi: asyncpio.pi
 
-    async def start(self) -> asyncpio.pi:
+    def __init__(
+        self,
+        *,
+        host: Optional[str] = None,
+        port: Union[int, str, None] = None,
+    ) -> None:
+        self.host = host
+        self.port = port
+
+    async def start(self, _: Dashy) -> asyncpio.pi:
+        address: dict[str, Any] = {}
+        if self.host is not None:
+            address["host"] = self.host
+        if self.port is not None:
+            address["port"] = self.port
+
         self.pi = asyncpio.pi()
-        await self.pi.connect()
+        await self.pi.connect(**address)
         return self.pi
 
     async def stop(self) -> None:
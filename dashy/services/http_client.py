@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, NamedTuple, Optional
+
+from aiohttp import (
+    BasicAuth,
+    ClientConnectionError,
+    ClientResponseError,
+    ClientSession,
+    ClientTimeout,
+)
+
+from dashy.services import ServiceProvider
+
+if TYPE_CHECKING:
+    from aiohttp import RequestInfo
+    from multidict import CIMultiDictProxy
+
+    from dashy.dashy import Dashy
+    from dashy.utils.metrics import Metrics
+
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF = 0.5
+DEFAULT_CACHE_SIZE = 64
+RETRY_STATUSES = {502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+class HttpResponse(NamedTuple):
+    status: int
+    reason: Optional[str]
+    headers: CIMultiDictProxy[str]
+    body: bytes
+    request_info: RequestInfo
+
+    @property
+    def ok(self) -> bool:
+        return self.status < 400
+
+    def text(self) -> str:
+        return self.body.decode()
+
+    def json(self) -> Any:
+        return json.loads(self.body)
+
+    def raise_for_status(self) -> None:
+        if not self.ok:
+            raise ClientResponseError(
+                self.request_info,
+                (),
+                status=self.status,
+                message=self.reason or "",
+                headers=self.headers,
+            )
+
+
+class HttpClient:
+    def __init__(  # noqa: PLR0913
+        self,
+        session: ClientSession,
+        metrics: Metrics,
+        *,
+        retries: int = DEFAULT_RETRIES,
+        backoff: float = DEFAULT_BACKOFF,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+    ) -> None:
+        self.session = session
+        self.metrics = metrics
+        self.retries = retries
+        self.backoff = backoff
+        self.cache_size = cache_size
+        self.cache: OrderedDict[str, tuple[float, HttpResponse]] = OrderedDict()
+        self.inflight: dict[str, asyncio.Task[HttpResponse]] = {}
+
+    async def request(  # noqa: PLR0913
+        self,
+        method: str,
+        url: str,
+        *,
+        headers: Optional[dict[str, str]] = None,
+        data: Any = None,
+        auth: Optional[BasicAuth] = None,
+        timeout: Optional[ClientTimeout] = None,
+        cache_ttl: float = 0,
+        retry: Optional[bool] = None,
+    ) -> HttpResponse:
+        if retry is None:
+            retry = method in IDEMPOTENT_METHODS
+
+        async def send() -> HttpResponse:
+            return await self.send(
+                method, url, headers=headers, data=data, auth=auth, timeout=timeout
+            )
+
+        if method != "GET" or cache_ttl <= 0:
+            return await self.with_retries(send, retry=retry)
+
+        key = self.cache_key(url, headers)
+        cached = self.cache.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            self.cache.move_to_end(key)
+            self.metrics.increment("http_cache", result="hit")
+            return cached[1]
+
+        task = self.inflight.get(key)
+        if task is None:
+            self.metrics.increment("http_cache", result="miss")
+            task = self.inflight[key] = asyncio.create_task(
+                self.with_retries(send, retry=retry)
+            )
+            task.add_done_callback(lambda _: self.inflight.pop(key, None))
+        else:
+            self.metrics.increment("http_cache", result="coalesced")
+
+        response = await asyncio.shield(task)
+        if response.ok:
+            self.remember(key, response, cache_ttl)
+        return response
+
+    @staticmethod
+    def cache_key(url: str, headers: Optional[dict[str, str]]) -> str:
+        if not headers:
+            return url
+        return url + "\0" + "\0".join(f"{k}:{v}" for k, v in sorted(headers.items()))
+
+    def remember(self, key: str, response: HttpResponse, ttl: float) -> None:
+        self.cache[key] = (time.monotonic() + ttl, response)
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    async def send(  # noqa: PLR0913
+        self,
+        method: str,
+        url: str,
+        *,
+        headers: Optional[dict[str, str]],
+        data: Any,
+        auth: Optional[BasicAuth],
+        timeout: Optional[ClientTimeout],
+    ) -> HttpResponse:
+        async with self.session.request(
+            method,
+            url,
+            headers=headers,
+            data=data,
+            auth=auth,
+            timeout=timeout,
+        ) as r:
+            return HttpResponse(
+                r.status, r.reason, r.headers, await r.read(), r.request_info
+            )
+
+    async def with_retries(
+        self, send: Callable[[], Awaitable[HttpResponse]], *, retry: bool
+    ) -> HttpResponse:
+        attempt = 0
+        while True:
+            exhausted = not retry or attempt >= self.retries
+            try:
+                response = await send()
+            except (ClientConnectionError, asyncio.TimeoutError):
+                if exhausted:
+                    raise
+            else:
+                if exhausted or response.status not in RETRY_STATUSES:
+                    return response
+
+            self.metrics.increment("http_retries")
+            delay = self.backoff * 2**attempt * random.uniform(0.5, 1.5)  # noqa: S311
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+class HttpClientProvider(ServiceProvider[HttpClient]):
+    dependencies = (ClientSession,)
+
+    def __init__(
+        self,
+        *,
+        retries: int = DEFAULT_RETRIES,
+        backoff: float = DEFAULT_BACKOFF,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+    ) -> None:
+        self.retries = retries
+        self.backoff = backoff
+        self.cache_size = cache_size
+
+    async def start(self, dashy: Dashy) -> HttpClient:
+        session = await dashy.get_service(ClientSession)
+        return HttpClient(
+            session,
+            dashy.metrics,
+            retries=self.retries,
+            backoff=self.backoff,
+            cache_size=self.cache_size,
+        )
+
+    async def stop(self) -> None:
+        pass
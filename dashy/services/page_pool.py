@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager, suppress
+from typing import TYPE_CHECKING, AsyncIterator, Optional
+
+if TYPE_CHECKING:
+    from playwright.async_api import Browser, Page
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_SIZE = 4
+DEFAULT_IDLE_TIMEOUT = 300.0
+HEALTH_CHECK_TIMEOUT = 5.0
+
+
+class PagePool:
+    def __init__(
+        self,
+        browser: Browser,
+        *,
+        max_size: int = DEFAULT_MAX_SIZE,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+    ) -> None:
+        self.browser = browser
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.idle: dict[tuple[int, int], list[tuple[Page, float]]] = {}
+        self.reaper: Optional[asyncio.Task[None]] = None
+
+    def start(self) -> None:
+        self.reaper = asyncio.create_task(self.reap_loop())
+
+    async def close(self) -> None:
+        if self.reaper is not None:
+            self.reaper.cancel()
+            with suppress(asyncio.CancelledError):
+                await self.reaper
+            self.reaper = None
+
+        idle, self.idle = self.idle, {}
+        for pages in idle.values():
+            for page, _ in pages:
+                await self.discard(page)
+
+    @asynccontextmanager
+    async def page(self, width: int, height: int) -> AsyncIterator[Page]:
+        viewport = (width, height)
+        page = await self.acquire(viewport)
+        try:
+            yield page
+        except BaseException:
+            await self.discard(page)
+            raise
+        await self.release(viewport, page)
+
+    async def acquire(self, viewport: tuple[int, int]) -> Page:
+        pages = self.idle.get(viewport, [])
+        while pages:
+            page, _ = pages.pop()
+            if await self.healthy(page):
+                return page
+            await self.discard(page)
+
+        width, height = viewport
+        return await self.browser.new_page(viewport={"width": width, "height": height})
+
+    async def release(self, viewport: tuple[int, int], page: Page) -> None:
+        try:
+            await page.unroute_all(behavior="ignoreErrors")
+            await page.goto("about:blank")
+        except Exception:
+            logger.exception("Failed to reset page, discarding:")
+            await self.discard(page)
+            return
+
+        self.idle.setdefault(viewport, []).append((page, time.monotonic()))
+        await self.trim()
+
+    async def healthy(self, page: Page) -> bool:
+        if page.is_closed():
+            return False
+
+        try:
+            await asyncio.wait_for(page.evaluate("1"), HEALTH_CHECK_TIMEOUT)
+        except Exception:
+            logger.warning("Pooled page failed health check, discarding")
+            return False
+        return True
+
+    async def discard(self, page: Page) -> None:
+        with suppress(Exception):
+            await page.close()
+
+    async def trim(self) -> None:
+        entries = sorted(
+            (
+                (last_used, viewport, page)
+                for viewport, pages in self.idle.items()
+                for page, last_used in pages
+            ),
+            key=lambda entry: entry[0],
+        )
+        now = time.monotonic()
+        excess = len(entries) - self.max_size
+        expired = []
+        for last_used, viewport, page in entries:
+            if excess <= 0 and now - last_used < self.idle_timeout:
+                break
+            excess -= 1
+            self.idle[viewport].remove((page, last_used))
+            expired.append(page)
+
+        for page in expired:
+            await self.discard(page)
+
+    async def reap_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.idle_timeout / 2)
+            await self.trim()
@@ -1,17 +1,65 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Optional
+
 from playwright.async_api import Browser, Playwright, async_playwright
 
 from dashy.services import ServiceProvider
+from dashy.services.page_pool import DEFAULT_IDLE_TIMEOUT, DEFAULT_MAX_SIZE, PagePool
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    from dashy.dashy import Dashy
 
 
 class PlaywrightProvider(ServiceProvider[Browser]):
     playwright: Playwright
     browser: Browser
 
-    async def start(self) -> Browser:
+    def __init__(
+        self,
+        *,
+        args: Sequence[str] = (),
+        executable_path: Optional[str] = None,
+    ) -> None:
+        self.args = list(args)
+        self.executable_path = executable_path
+
+    async def start(self, _: Dashy) -> Browser:
         self.playwright = await async_playwright().start()
-        self.browser = await self.playwright.chromium.launch(handle_sigint=False)
+        self.browser = await self.playwright.chromium.launch(
+            args=self.args,
+            executable_path=self.executable_path,
+            handle_sigint=False,
+        )
         return self.browser
 
     async def stop(self) -> None:
         await self.browser.close()
         await self.playwright.stop()
+
+
+class PagePoolProvider(ServiceProvider[PagePool]):
+    dependencies = (Browser,)
+    pool: PagePool
+
+    def __init__(
+        self,
+        *,
+        max_size: int = DEFAULT_MAX_SIZE,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+    ) -> None:
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+
+    async def start(self, dashy: Dashy) -> PagePool:
+        browser = await dashy.get_service(Browser)
+        self.pool = PagePool(
+            browser, max_size=self.max_size, idle_timeout=self.idle_timeout
+        )
+        self.pool.start()
+        return self.pool
+
+    async def stop(self) -> None:
+        await self.pool.close()
@@ -1,4 +1,6 @@
+from dashy.utils.artwork_cache import ArtworkCache
 from dashy.utils.double_click_detector import DoubleClickDetector
+from dashy.utils.frame_cache import FrameCache
 from dashy.utils.resize_image import resize_image
 
-__all__ = ["DoubleClickDetector", "resize_image"]
+__all__ = ["ArtworkCache", "DoubleClickDetector", "FrameCache", "resize_image"]
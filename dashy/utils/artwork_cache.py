@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, NamedTuple, Optional, Union
+
+from dashy.utils.disk_cache import evict, write_atomic
+
+if TYPE_CHECKING:
+    import aiohttp
+    from multidict import CIMultiDictProxy
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_MEMORY = 16 * 1024 * 1024
+DEFAULT_MAX_DISK = 128 * 1024 * 1024
+DEFAULT_TTL = 86400
+DEFAULT_TIMEOUT = 10.0
+
+
+class Artwork(NamedTuple):
+    status: int
+    data: bytes
+    content_type: Optional[str]
+
+
+class CachedArtwork(NamedTuple):
+    data: bytes
+    content_type: Optional[str]
+    etag: Optional[str]
+    last_modified: Optional[str]
+    expires: float
+
+
+def parse_http_date(value: Optional[str]) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_expires(headers: CIMultiDictProxy[str], now: float) -> Optional[float]:
+    directives = {}
+    for directive in headers.get("Cache-Control", "").split(","):
+        name, _, value = directive.strip().partition("=")
+        directives[name.lower()] = value.strip('"')
+
+    if "no-store" in directives:
+        return None
+    if "no-cache" in directives:
+        return now
+    if "max-age" in directives:
+        max_age = directives["max-age"]
+        return now + int(max_age) if max_age.isdigit() else now
+
+    expires = parse_http_date(headers.get("Expires"))
+    if expires is not None:
+        return expires
+
+    last_modified = parse_http_date(headers.get("Last-Modified"))
+    if last_modified is not None:
+        return now + min(max((now - last_modified) / 10, 0), DEFAULT_TTL)
+
+    return now + DEFAULT_TTL
+
+
+class ArtworkCache:
+    def __init__(
+        self,
+        *,
+        max_memory: int = DEFAULT_MAX_MEMORY,
+        path: Union[Path, str, None] = None,
+        max_disk: int = DEFAULT_MAX_DISK,
+        timeout: float = DEFAULT_TIMEOUT,
+    ) -> None:
+        if isinstance(path, str):
+            path = Path(path).expanduser()
+        self.max_memory = max_memory
+        self.path: Optional[Path] = path
+        self.max_disk = max_disk
+        self.timeout = timeout
+
+        self.memory: OrderedDict[str, CachedArtwork] = OrderedDict()
+        self.memory_size = 0
+
+    @staticmethod
+    def key(url: str) -> str:
+        return hashlib.sha256(url.encode()).hexdigest()
+
+    async def fetch(self, session: aiohttp.ClientSession, url: str) -> Artwork:
+        key = self.key(url)
+        entry = await self.get(key)
+        now = time.time()
+        if entry is not None and entry.expires > now:
+            return Artwork(200, entry.data, entry.content_type)
+
+        try:
+            status, data, headers = await self.request(session, url, entry)
+        except Exception:
+            if entry is None:
+                raise
+            logger.warning("Failed to revalidate artwork, serving stale copy")
+            return Artwork(200, entry.data, entry.content_type)
+
+        expires = parse_expires(headers, now)
+
+        if entry is not None and (status == 304 or status >= 500):
+            if status == 304 and expires is not None:
+                await self.put(key, entry._replace(expires=expires))
+            elif status != 304:
+                logger.warning("Artwork server returned %s, serving stale copy", status)
+            return Artwork(200, entry.data, entry.content_type)
+
+        content_type = headers.get("Content-Type")
+        if status == 200 and expires is not None:
+            await self.put(
+                key,
+                CachedArtwork(
+                    data,
+                    content_type,
+                    headers.get("ETag"),
+                    headers.get("Last-Modified"),
+                    expires,
+                ),
+            )
+        return Artwork(status, data, content_type)
+
+    async def request(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        entry: Optional[CachedArtwork],
+    ) -> tuple[int, bytes, CIMultiDictProxy[str]]:
+        from aiohttp import ClientTimeout
+
+        headers = {}
+        if entry is not None:
+            if entry.etag is not None:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified is not None:
+                headers["If-Modified-Since"] = entry.last_modified
+
+        async with session.get(
+            url,
+            headers=headers,
+            timeout=ClientTimeout(total=self.timeout),
+        ) as r:
+            return r.status, await r.read(), r.headers
+
+    async def get(self, key: str) -> Optional[CachedArtwork]:
+        entry = self.memory.get(key)
+        if entry is not None:
+            self.memory.move_to_end(key)
+            return entry
+
+        if self.path is None:
+            return None
+
+        loop = asyncio.get_running_loop()
+        entry = await loop.run_in_executor(None, self.load, self.path, key)
+        if entry is not None:
+            self.remember(key, entry)
+        return entry
+
+    async def put(self, key: str, entry: CachedArtwork) -> None:
+        self.remember(key, entry)
+
+        if self.path is not None:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self.store, self.path, key, entry)
+
+    def remember(self, key: str, entry: CachedArtwork) -> None:
+        size = len(entry.data)
+        if size > self.max_memory:
+            return
+
+        previous = self.memory.pop(key, None)
+        if previous is not None:
+            self.memory_size -= len(previous.data)
+
+        self.memory[key] = entry
+        self.memory_size += size
+
+        while self.memory_size > self.max_memory:
+            _, evicted = self.memory.popitem(last=False)
+            self.memory_size -= len(evicted.data)
+
+    def load(self, path: Path, key: str) -> Optional[CachedArtwork]:
+        filename = path / f"{key}.art"
+        try:
+            with filename.open("rb") as f:
+                meta: dict[str, Any] = json.loads(f.readline())
+                data = f.read()
+            os.utime(filename)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            logger.exception("Failed to load cached artwork %s:", filename)
+            return None
+
+        return CachedArtwork(
+            data,
+            meta.get("content_type"),
+            meta.get("etag"),
+            meta.get("last_modified"),
+            meta.get("expires", 0),
+        )
+
+    def store(self, path: Path, key: str, entry: CachedArtwork) -> None:
+        filename = path / f"{key}.art"
+        meta = {
+            "content_type": entry.content_type,
+            "etag": entry.etag,
+            "last_modified": entry.last_modified,
+            "expires": entry.expires,
+        }
+        try:
+            write_atomic(filename, json.dumps(meta).encode() + b"\n" + entry.data)
+        except Exception:
+            logger.exception("Failed to store cached artwork %s:", filename)
+            return
+
+        evict(path, self.max_disk, ".art")
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import os
+import tempfile
+from contextlib import contextmanager, suppress
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+
+@contextmanager
+def atomic_path(filename: Path) -> Iterator[Path]:
+    filename.parent.mkdir(parents=True, exist_ok=True)
+    fd, name = tempfile.mkstemp(
+        dir=filename.parent, prefix=f".{filename.stem}-", suffix=".tmp"
+    )
+    os.fchmod(fd, 0o644)
+    os.close(fd)
+    temp_filename = Path(name)
+    try:
+        yield temp_filename
+        temp_filename.replace(filename)
+    except BaseException:
+        temp_filename.unlink(missing_ok=True)
+        raise
+
+
+def write_atomic(filename: Path, data: bytes) -> None:
+    with atomic_path(filename) as temp_filename:
+        temp_filename.write_bytes(data)
+
+
+def evict(path: Path, max_size: int, suffix: str) -> None:
+    entries = []
+    total = 0
+    for entry in os.scandir(path):
+        if not entry.name.endswith(suffix):
+            continue
+        with suppress(FileNotFoundError):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+
+    entries.sort()
+    for _, size, filename in entries:
+        if total <= max_size:
+            break
+        Path(filename).unlink(missing_ok=True)
+        total -= size
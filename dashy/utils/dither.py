@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Literal, Sequence, cast
+
+import numpy as np
+import numpy.typing as npt
+from PIL import Image
+
+DitherMode = Literal["DIFFUSION", "ORDERED", "NONE"]
+Palette = Sequence[tuple[int, int, int]]
+
+ORDERED_SPREAD = 64.0
+
+
+@lru_cache(maxsize=1)
+def get_executor() -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(
+        max_workers=1, mp_context=multiprocessing.get_context("spawn")
+    )
+
+
+@lru_cache(maxsize=4)
+def bayer_matrix(order: int) -> npt.NDArray[np.float32]:
+    matrix = np.zeros((1, 1), dtype=np.float32)
+    for _ in range(order):
+        matrix = np.block(
+            [[4 * matrix, 4 * matrix + 2], [4 * matrix + 3, 4 * matrix + 1]]
+        )
+    return cast(npt.NDArray[np.float32], (matrix + 0.5) / matrix.size - 0.5)
+
+
+def nearest(pixels: npt.NDArray[np.float32], palette: Palette) -> npt.NDArray[np.uint8]:
+    colours = np.asarray(palette, dtype=np.float32)
+    distances = np.empty(pixels.shape[:2] + (len(colours),), dtype=np.float32)
+    for i, colour in enumerate(colours):
+        distances[..., i] = np.square(pixels - colour).sum(axis=-1)
+    indices: npt.NDArray[np.uint8] = distances.argmin(axis=-1).astype(np.uint8)
+    return indices
+
+
+def dither(
+    image: Image.Image, palette: Palette, mode: DitherMode
+) -> npt.NDArray[np.uint8]:
+    image = image.convert("RGB")
+
+    if mode == "DIFFUSION":
+        palette_image = Image.new("P", (1, 1))
+        palette_image.putpalette([value for colour in palette for value in colour])
+        return np.asarray(
+            image.quantize(palette=palette_image, dither=Image.Dither.FLOYDSTEINBERG),
+            dtype=np.uint8,
+        )
+
+    pixels = np.asarray(image, dtype=np.float32)
+    if mode == "ORDERED":
+        height, width = pixels.shape[:2]
+        threshold = bayer_matrix(3)
+        tiles = (height // len(threshold) + 1, width // len(threshold) + 1)
+        pixels = pixels + (
+            np.tile(threshold, tiles)[:height, :width, None] * ORDERED_SPREAD
+        )
+    return nearest(pixels, palette)
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Union, cast
+
+from PIL import Image
+
+from dashy.utils.disk_cache import atomic_path, evict
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_MEMORY = 32 * 1024 * 1024
+DEFAULT_MAX_DISK = 256 * 1024 * 1024
+
+
+def image_size(image: Image.Image) -> int:
+    return cast(int, image.width * image.height * len(image.getbands()))
+
+
+class FrameCache:
+    def __init__(
+        self,
+        *,
+        max_memory: int = DEFAULT_MAX_MEMORY,
+        path: Union[Path, str, None] = None,
+        max_disk: int = DEFAULT_MAX_DISK,
+    ) -> None:
+        if isinstance(path, str):
+            path = Path(path).expanduser()
+        self.max_memory = max_memory
+        self.path: Optional[Path] = path
+        self.max_disk = max_disk
+
+        self.memory: OrderedDict[str, Image.Image] = OrderedDict()
+        self.memory_size = 0
+
+    @staticmethod
+    def key(
+        dashboard: str, item: str, template: str, resolution: tuple[int, int]
+    ) -> str:
+        template_hash = hashlib.sha256(template.encode()).hexdigest()
+        width, height = resolution
+        return hashlib.sha256(
+            f"{dashboard}\0{item}\0{template_hash}\0{width}x{height}".encode()
+        ).hexdigest()
+
+    async def get(self, key: str) -> Optional[Image.Image]:
+        image = self.memory.get(key)
+        if image is not None:
+            self.memory.move_to_end(key)
+            return image.copy()
+
+        if self.path is None:
+            return None
+
+        loop = asyncio.get_running_loop()
+        image = await loop.run_in_executor(None, self.load, self.path, key)
+        if image is None:
+            return None
+
+        self.remember(key, image)
+        return image.copy()
+
+    async def put(self, key: str, image: Image.Image) -> None:
+        image = image.copy()
+        self.remember(key, image)
+
+        if self.path is not None:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self.store, self.path, key, image)
+
+    def remember(self, key: str, image: Image.Image) -> None:
+        size = image_size(image)
+        if size > self.max_memory:
+            return
+
+        previous = self.memory.pop(key, None)
+        if previous is not None:
+            self.memory_size -= image_size(previous)
+
+        self.memory[key] = image
+        self.memory_size += size
+
+        while self.memory_size > self.max_memory:
+            _, evicted = self.memory.popitem(last=False)
+            self.memory_size -= image_size(evicted)
+
+    def load(self, path: Path, key: str) -> Optional[Image.Image]:
+        filename = path / f"{key}.png"
+        try:
+            with Image.open(filename) as im:
+                im.load()
+                os.utime(filename)
+                return im.copy()
+        except FileNotFoundError:
+            return None
+        except Exception:
+            logger.exception("Failed to load cached frame %s:", filename)
+            return None
+
+    def store(self, path: Path, key: str, image: Image.Image) -> None:
+        filename = path / f"{key}.png"
+        try:
+            with atomic_path(filename) as temp_filename:
+                image.save(temp_filename, "PNG", compress_level=1)
+        except Exception:
+            logger.exception("Failed to store cached frame %s:", filename)
+            return
+
+        evict(path, self.max_disk, ".png")
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from contextlib import suppress
+from functools import partial
+from typing import TYPE_CHECKING, Optional, Union
+
+from dashy.dashboards import Dashboard
+from dashy.displays import Display
+
+if TYPE_CHECKING:
+    from types import FrameType
+
+    from dashy.dashy import Dashy
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THRESHOLD = 0.1
+DEFAULT_INTERVAL = 0.05
+
+
+def find_owner(frame: Optional[FrameType]) -> Union[Dashboard, Display, None]:
+    while frame is not None:
+        owner = frame.f_locals.get("self")
+        if isinstance(owner, (Dashboard, Display)):
+            return owner
+        frame = frame.f_back
+    return None
+
+
+class LoopWatchdog:
+    dashy: Dashy
+    loop: asyncio.AbstractEventLoop
+
+    def __init__(
+        self,
+        *,
+        threshold: float = DEFAULT_THRESHOLD,
+        interval: float = DEFAULT_INTERVAL,
+    ) -> None:
+        self.threshold = threshold
+        self.interval = interval
+        self.last_beat = time.monotonic()
+        self.loop_thread: Optional[int] = None
+        self.stopped = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        self.task: Optional[asyncio.Task[None]] = None
+
+    async def start(self, dashy: Dashy) -> None:
+        self.dashy = dashy
+        self.loop = asyncio.get_running_loop()
+        self.loop_thread = threading.get_ident()
+        self.last_beat = time.monotonic()
+        self.stopped.clear()
+        self.task = asyncio.create_task(self.heartbeat())
+        self.thread = threading.Thread(
+            target=self.monitor, name="dashy-watchdog", daemon=True
+        )
+        self.thread.start()
+
+    async def stop(self) -> None:
+        self.stopped.set()
+        if self.task is not None:
+            self.task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self.task
+            self.task = None
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    async def heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(now - self.last_beat - self.interval, 0)
+            self.last_beat = now
+            self.dashy.metrics.observe("loop_lag", lag)
+            if lag > self.threshold:
+                logger.warning("Event loop was blocked for %.3fs", lag)
+
+    def monitor(self) -> None:
+        reported = None
+        while not self.stopped.wait(self.interval / 2):
+            beat = self.last_beat
+            if beat == reported or time.monotonic() - beat <= self.threshold:
+                continue
+
+            reported = beat
+            frame = sys._current_frames().get(self.loop_thread or 0)  # noqa: SLF001
+            if frame is None:
+                continue
+
+            found = find_owner(frame)
+            owner = None if found is None else found.name
+            self.loop.call_soon_threadsafe(
+                partial(
+                    self.dashy.metrics.increment,
+                    "loop_stalls",
+                    owner=owner or "unknown",
+                )
+            )
+            logger.warning(
+                "Event loop blocked for more than %.3fs in %s:\n%s",
+                self.threshold,
+                owner or "unknown code",
+                "".join(traceback.format_stack(frame)),
+            )
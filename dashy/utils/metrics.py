@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, suppress
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+PREFIX = "dashy_"
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def format_labels(labels: Labels, extra: Optional[tuple[str, str]] = None) -> str:
+    pairs = [*labels, extra] if extra is not None else list(labels)
+    if not pairs:
+        return ""
+    escaped = (
+        (name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+
+class Metrics:
+    def __init__(
+        self,
+        *,
+        host: str = "127.0.0.1",
+        port: Optional[int] = None,
+        log_interval: Optional[float] = 300.0,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.log_interval = log_interval
+        self.histograms: dict[tuple[str, Labels], Histogram] = {}
+        self.counters: dict[tuple[str, Labels], float] = {}
+        self.runner: Optional[web.AppRunner] = None
+        self.log_task: Optional[asyncio.Task[None]] = None
+
+    @staticmethod
+    def labels(labels: dict[str, Optional[str]]) -> Labels:
+        return tuple(
+            sorted((name, value) for name, value in labels.items() if value is not None)
+        )
+
+    def observe(self, name: str, value: float, **labels: Optional[str]) -> None:
+        key = (name, self.labels(labels))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        histogram.observe(value)
+
+    def increment(self, name: str, value: float = 1, **labels: Optional[str]) -> None:
+        key = (name, self.labels(labels))
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    @contextmanager
+    def timer(self, name: str, **labels: Optional[str]) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    async def start(self) -> None:
+        if self.port is not None:
+            from aiohttp import web
+
+            app = web.Application()
+            app.router.add_get("/metrics", self.handle_metrics)
+            self.runner = web.AppRunner(app, access_log=None)
+            await self.runner.setup()
+            await web.TCPSite(self.runner, self.host, self.port).start()
+
+        if self.log_interval is not None:
+            self.log_task = asyncio.create_task(self.log_loop(self.log_interval))
+
+    async def stop(self) -> None:
+        if self.log_task is not None:
+            self.log_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self.log_task
+            self.log_task = None
+
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
+
+    async def handle_metrics(self, _: web.Request) -> web.Response:
+        from aiohttp import web
+
+        return web.Response(
+            text=self.render(), content_type="text/plain", charset="utf-8"
+        )
+
+    def render(self) -> str:
+        lines: list[str] = []
+        seen: set[str] = set()
+        for (name, labels), value in sorted(self.counters.items()):
+            metric = f"{PREFIX}{name}_total"
+            if metric not in seen:
+                seen.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric}{format_labels(labels)} {value}")
+
+        for (name, labels), histogram in sorted(self.histograms.items()):
+            metric = f"{PREFIX}{name}_seconds"
+            if metric not in seen:
+                seen.add(metric)
+                lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                bucket_labels = format_labels(labels, ("le", str(bound)))
+                lines.append(f"{metric}_bucket{bucket_labels} {cumulative}")
+            bucket_labels = format_labels(labels, ("le", "+Inf"))
+            lines.append(f"{metric}_bucket{bucket_labels} {histogram.count}")
+            lines.append(f"{metric}_sum{format_labels(labels)} {histogram.sum}")
+            lines.append(f"{metric}_count{format_labels(labels)} {histogram.count}")
+
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> list[str]:
+        lines = []
+        for (name, labels), histogram in sorted(self.histograms.items()):
+            if not histogram.count:
+                continue
+            label_text = " ".join(f"{key}={value}" for key, value in labels)
+            lines.append(
+                f"{name} {label_text}: n={histogram.count}"
+                f" mean={histogram.sum / histogram.count * 1000:.1f}ms"
+                f" p50<={histogram.quantile(0.5) * 1000:.0f}ms"
+                f" p95<={histogram.quantile(0.95) * 1000:.0f}ms"
+                f" max={histogram.max * 1000:.1f}ms"
+            )
+        for (name, labels), total in sorted(self.counters.items()):
+            label_text = " ".join(f"{key}={value}" for key, value in labels)
+            lines.append(f"{name} {label_text}: {total:g}")
+        return lines
+
+    async def log_loop(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            for line in self.summary():
+                logger.info("%s", line)
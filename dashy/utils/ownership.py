@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any, Callable, Optional, TypeVar
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+T = TypeVar("T")
+
+current_owner: ContextVar[Optional[str]] = ContextVar("current_owner", default=None)
+thread_owners: dict[int, str] = {}
+
+
+def run_owned(owner: str, fn: Callable[..., T], /, *args: Any, **kwargs: Any) -> T:
+    ident = threading.get_ident()
+    thread_owners[ident] = owner
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        thread_owners.pop(ident, None)
+
+
+class OwnedExecutor(ThreadPoolExecutor):
+    def submit(self, fn: Callable[..., T], /, *args: Any, **kwargs: Any) -> Future[T]:
+        owner = current_owner.get()
+        if owner is None:
+            return super().submit(fn, *args, **kwargs)
+        return super().submit(run_owned, owner, fn, *args, **kwargs)
@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+from collections import defaultdict
+from contextlib import suppress
+from pathlib import Path
+from typing import Callable, NamedTuple, Optional
+
+from PIL import Image
+
+from dashy.utils.disk_cache import write_atomic
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX_DIR = Path.home() / ".cache" / "dashy"
+DEFAULT_POLL_INTERVAL = 60.0
+INDEX_VERSION = 1
+
+
+class IndexEntry(NamedTuple):
+    mtime_ns: int
+    size: int
+    width: int
+    height: int
+
+
+class LibraryIndex(NamedTuple):
+    directories: dict[str, int]
+    files: dict[str, IndexEntry]
+
+
+EMPTY_INDEX = LibraryIndex({}, {})
+
+
+def probe_image(path: str) -> tuple[int, int]:
+    try:
+        with Image.open(path) as im:
+            size: tuple[int, int] = im.size
+            im.verify()
+    except Exception:
+        return 0, 0
+    return size
+
+
+def parent(name: str) -> str:
+    return name.rpartition("/")[0]
+
+
+def scan_directory(
+    root: Path, directory: str, previous: LibraryIndex, *, recursive: bool
+) -> tuple[dict[str, IndexEntry], list[str]]:
+    files: dict[str, IndexEntry] = {}
+    subdirectories: list[str] = []
+    for entry in os.scandir(root / directory):
+        if entry.name.startswith("."):
+            continue
+
+        name = f"{directory}/{entry.name}" if directory else entry.name
+        if entry.is_dir():
+            if recursive:
+                subdirectories.append(name)
+            continue
+        if not entry.is_file():
+            continue
+
+        stat = entry.stat()
+        file = previous.files.get(name)
+        if file is None or (file.mtime_ns, file.size) != (
+            stat.st_mtime_ns,
+            stat.st_size,
+        ):
+            file = IndexEntry(stat.st_mtime_ns, stat.st_size, *probe_image(entry.path))
+        files[name] = file
+    return files, subdirectories
+
+
+def scan(
+    root: Path, previous: LibraryIndex, *, recursive: bool, full: bool
+) -> LibraryIndex:
+    children: dict[str, list[str]] = defaultdict(list)
+    for directory in previous.directories:
+        if directory:
+            children[parent(directory)].append(directory)
+
+    previous_files: dict[str, list[str]] = defaultdict(list)
+    for file in previous.files:
+        previous_files[parent(file)].append(file)
+
+    directories: dict[str, int] = {}
+    files: dict[str, IndexEntry] = {}
+    pending = [""]
+    while pending:
+        directory = pending.pop()
+        try:
+            mtime_ns = (root / directory).stat().st_mtime_ns
+            if full or previous.directories.get(directory) != mtime_ns:
+                directory_files, subdirectories = scan_directory(
+                    root, directory, previous, recursive=recursive
+                )
+            else:
+                directory_files = {
+                    file: previous.files[file] for file in previous_files[directory]
+                }
+                subdirectories = children[directory]
+        except OSError:
+            continue
+
+        directories[directory] = mtime_ns
+        files.update(directory_files)
+        pending.extend(subdirectories)
+
+    return LibraryIndex(directories, files)
+
+
+def load_index(path: Path) -> LibraryIndex:
+    try:
+        data = json.loads(path.read_bytes())
+    except FileNotFoundError:
+        return EMPTY_INDEX
+    except Exception:
+        logger.exception("Failed to load library index %s:", path)
+        return EMPTY_INDEX
+
+    if data.get("version") != INDEX_VERSION:
+        return EMPTY_INDEX
+
+    return LibraryIndex(
+        data["directories"],
+        {name: IndexEntry(*entry) for name, entry in data["files"].items()},
+    )
+
+
+def store_index(path: Path, index: LibraryIndex) -> None:
+    data = {
+        "version": INDEX_VERSION,
+        "directories": index.directories,
+        "files": index.files,
+    }
+    try:
+        write_atomic(path, json.dumps(data, separators=(",", ":")).encode())
+    except Exception:
+        logger.exception("Failed to store library index %s:", path)
+
+
+class PhotoLibrary:
+    def __init__(
+        self,
+        path: Path,
+        *,
+        recursive: bool = True,
+        persist_index: bool = True,
+        poll_interval: Optional[float] = DEFAULT_POLL_INTERVAL,
+    ) -> None:
+        self.path = path
+        self.recursive = recursive
+        self.poll_interval = poll_interval
+        self.index_path: Optional[Path] = None
+        if persist_index:
+            digest = hashlib.sha256(str(path.resolve()).encode()).hexdigest()[:16]
+            self.index_path = DEFAULT_INDEX_DIR / f"library-{digest}.json"
+
+        self.index = EMPTY_INDEX
+        self.photos: set[str] = set()
+        self.order: list[str] = []
+        self.position = 0
+        self.on_change: Optional[Callable[[], None]] = None
+        self.task: Optional[asyncio.Task[None]] = None
+
+    def __len__(self) -> int:
+        return len(self.photos)
+
+    async def start(self) -> None:
+        if self.index_path is not None:
+            loop = asyncio.get_running_loop()
+            self.update(await loop.run_in_executor(None, load_index, self.index_path))
+        self.task = asyncio.create_task(self.watch())
+
+    async def stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self.task
+            self.task = None
+
+    async def watch(self) -> None:
+        full = True
+        while True:
+            try:
+                await self.rescan(full=full)
+            except Exception:
+                logger.exception("Failed to scan %s:", self.path)
+            full = False
+
+            if self.poll_interval is None:
+                return
+            await asyncio.sleep(self.poll_interval)
+
+    async def rescan(self, *, full: bool = False) -> None:
+        loop = asyncio.get_running_loop()
+        index = await loop.run_in_executor(
+            None,
+            lambda: scan(self.path, self.index, recursive=self.recursive, full=full),
+        )
+        if index == self.index:
+            return
+
+        self.update(index)
+        if self.index_path is not None:
+            await loop.run_in_executor(None, store_index, self.index_path, index)
+
+    def update(self, index: LibraryIndex) -> None:
+        self.index = index
+        photos = {name for name, entry in index.files.items() if entry.width}
+        added = photos - self.photos
+        removed = self.photos - photos
+        self.photos = photos
+        if not added and not removed:
+            return
+
+        logger.info(
+            "Photo library %s: %d photos (+%d, -%d)",
+            self.path,
+            len(photos),
+            len(added),
+            len(removed),
+        )
+
+        if len(added) > len(self.order) - self.position:
+            self.reshuffle()
+        else:
+            for name in added:
+                self.order.insert(
+                    random.randint(self.position + 1, len(self.order)),  # noqa: S311
+                    name,
+                )
+
+        if self.on_change is not None:
+            self.on_change()
+
+    def reshuffle(self) -> None:
+        self.skip_removed()
+        current = self.order[self.position] if self.position < len(self.order) else None
+        self.order = list(self.photos)
+        random.shuffle(self.order)
+        if current is not None and current in self.photos:
+            self.order.remove(current)
+            self.order.insert(0, current)
+        self.position = 0
+
+    def skip_removed(self) -> None:
+        while (
+            self.position < len(self.order)
+            and self.order[self.position] not in self.photos
+        ):
+            self.position += 1
+
+    def current(self) -> Optional[Path]:
+        self.skip_removed()
+        if self.position >= len(self.order):
+            return None
+        return self.path / self.order[self.position]
+
+    def advance(self) -> Optional[Path]:
+        self.position += 1
+        self.skip_removed()
+        if self.position >= len(self.order):
+            previous = self.order[-1] if self.order else None
+            self.order = list(self.photos)
+            random.shuffle(self.order)
+            if len(self.order) > 1 and self.order[0] == previous:
+                self.order.append(self.order.pop(0))
+            self.position = 0
+        return self.current()
+
+    def peek(self, count: int) -> list[Path]:
+        upcoming: list[Path] = []
+        for name in self.order[self.position + 1 :]:
+            if len(upcoming) >= count:
+                break
+            if name in self.photos:
+                upcoming.append(self.path / name)
+        return upcoming
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+import threading
+from collections import Counter, defaultdict
+from contextlib import suppress
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional, Union
+
+from dashy.displays import Display
+from dashy.utils.disk_cache import write_atomic
+from dashy.utils.loop_watchdog import find_owner
+from dashy.utils.ownership import OwnedExecutor, thread_owners
+
+if TYPE_CHECKING:
+    from types import FrameType
+
+    from dashy.dashy import Dashy
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL = 0.01
+DEFAULT_DUMP_INTERVAL = 60.0
+IDLE_FRAMES = {
+    ("select", "selectors.py"),
+    ("_worker", "thread.py"),
+    ("wait", "threading.py"),
+}
+
+
+def frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    filename = code.co_filename.rpartition("/")[2]
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+def is_idle(frame: FrameType) -> bool:
+    code = frame.f_code
+    return (code.co_name, code.co_filename.rpartition("/")[2]) in IDLE_FRAMES
+
+
+def collapse(thread_name: str, frame: Optional[FrameType]) -> str:
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame))
+        frame = frame.f_back
+    labels.append(thread_name)
+    return ";".join(reversed(labels))
+
+
+class SamplingProfiler:
+    dashy: Dashy
+
+    def __init__(
+        self,
+        path: Union[Path, str] = "profile",
+        *,
+        interval: float = DEFAULT_INTERVAL,
+        dump_interval: float = DEFAULT_DUMP_INTERVAL,
+    ) -> None:
+        if isinstance(path, str):
+            path = Path(path).expanduser()
+        self.path = path
+        self.interval = interval
+        self.dump_interval = dump_interval
+        self.samples: defaultdict[str, Counter[str]] = defaultdict(Counter)
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        self.task: Optional[asyncio.Task[None]] = None
+
+    async def start(self, dashy: Dashy) -> None:
+        self.dashy = dashy
+        self.stopped.clear()
+        asyncio.get_running_loop().set_default_executor(
+            OwnedExecutor(thread_name_prefix="dashy")
+        )
+        self.thread = threading.Thread(
+            target=self.sample_loop, name="dashy-profiler", daemon=True
+        )
+        self.thread.start()
+        self.task = asyncio.create_task(self.dump_loop())
+        logger.info("Sampling profiler writing collapsed stacks to %s", self.path)
+
+    async def stop(self) -> None:
+        self.stopped.set()
+        if self.task is not None:
+            self.task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self.task
+            self.task = None
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        await asyncio.get_running_loop().run_in_executor(None, self.dump)
+
+    def owner(self, thread_id: int, frame: FrameType) -> str:
+        owner = thread_owners.get(thread_id)
+        if owner is not None:
+            return owner
+        found = find_owner(frame)
+        if isinstance(found, Display):
+            found = self.dashy.last_dashboards.get(found)
+        if found is not None:
+            return found.name
+        current = self.dashy.current_dashboard
+        return "other" if current is None else current.name
+
+    def sample_loop(self) -> None:
+        own_thread = threading.get_ident()
+        while not self.stopped.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            frames = sys._current_frames()  # noqa: SLF001
+            with self.lock:
+                for thread_id, frame in frames.items():
+                    if thread_id == own_thread or is_idle(frame):
+                        continue
+                    stack = collapse(names.get(thread_id, str(thread_id)), frame)
+                    self.samples[self.owner(thread_id, frame)][stack] += 1
+            del frames
+
+    async def dump_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.dump_interval)
+            await loop.run_in_executor(None, self.dump)
+
+    def dump(self) -> None:
+        with self.lock:
+            snapshot = {owner: dict(stacks) for owner, stacks in self.samples.items()}
+
+        for owner, stacks in snapshot.items():
+            filename = self.path / f"{owner}.folded"
+            data = "".join(f"{stack} {count}\n" for stack, count in stacks.items())
+            try:
+                write_atomic(filename, data.encode())
+            except Exception:
+                logger.exception("Failed to write profile %s:", filename)
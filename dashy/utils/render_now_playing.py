@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from io import BytesIO
+from typing import Literal, Optional, Union
+
+from PIL import Image, ImageDraw, ImageFont
+
+from dashy.utils.resize_image import resize_image
+
+DEFAULT_FONTS = (
+    "DejaVuSans-Bold.ttf",
+    "LiberationSans-Bold.ttf",
+    "FreeSansBold.ttf",
+    "Arial Bold.ttf",
+)
+
+TEXT_COLOUR = "white"
+SHADOW_COLOUR = "#1c171c"
+SHADOW_OFFSET = 5
+LINE_HEIGHT = 1.15
+
+Font = Union[ImageFont.FreeTypeFont, ImageFont.ImageFont]
+
+
+@lru_cache(maxsize=32)
+def load_font(size: int, font: Optional[str] = None) -> Font:
+    for name in (font,) if font is not None else DEFAULT_FONTS:
+        try:
+            return ImageFont.truetype(name, size)
+        except OSError:  # noqa: PERF203
+            continue
+    return ImageFont.load_default(size)
+
+
+def decode_image(data: bytes) -> Image.Image:
+    im = Image.open(BytesIO(data))
+    im.load()
+    return im
+
+
+def wrap_text(text: str, font: Font, width: int) -> list[str]:
+    lines: list[str] = []
+    line = ""
+    for word in text.split():
+        candidate = f"{line} {word}" if line else word
+        if font.getlength(candidate) <= width:
+            line = candidate
+            continue
+
+        if line:
+            lines.append(line)
+        line = ""
+        for char in word:
+            if line and font.getlength(line + char) > width:
+                lines.append(line)
+                line = ""
+            line += char
+    if line:
+        lines.append(line)
+    return lines
+
+
+def render_now_playing(  # noqa: PLR0913
+    size: tuple[int, int],
+    *,
+    cover: Optional[Image.Image],
+    title: str,
+    subtitle: Optional[str] = None,
+    font: Optional[str] = None,
+    background: Literal["FIT", "COVER"] = "COVER",
+) -> Image.Image:
+    width, height = size
+    canvas = Image.new("RGB", size, "white")
+    if cover is not None:
+        resized = resize_image(cover, size, mode=background)
+        canvas.paste(resized, (0, 0), resized)
+        resized.close()
+
+    left = int(width * 0.05)
+    bottom = height - int(height * 0.025)
+    text_width = width - left
+
+    blocks = [(title, int(height * 0.10))]
+    if subtitle:
+        blocks.append((subtitle, int(height * 0.07)))
+
+    lines: list[tuple[str, Font, int]] = []
+    for text, font_size in blocks:
+        text_font = load_font(font_size, font)
+        lines.extend(
+            (line, text_font, int(font_size * LINE_HEIGHT))
+            for line in wrap_text(text, text_font, text_width)
+        )
+
+    draw = ImageDraw.Draw(canvas)
+    y = bottom - sum(line_height for _, _, line_height in lines)
+    for line, text_font, line_height in lines:
+        draw.text(
+            (left + SHADOW_OFFSET, y + SHADOW_OFFSET),
+            line,
+            font=text_font,
+            fill=SHADOW_COLOUR,
+        )
+        draw.text((left, y), line, font=text_font, fill=TEXT_COLOUR)
+        y += line_height
+
+    return canvas
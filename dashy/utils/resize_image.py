@@ -26,7 +26,8 @@ def resize_image(
     new_width = int(im.width * rescale_ratio)
     new_height = int(im.height * rescale_ratio)
 
-    resized_im = im.resize((new_width, new_height))
+    im.draft(None, (new_width, new_height))
+    resized_im = im.resize((new_width, new_height), reducing_gap=2.0)
 
     x_offset = int((canvas.width - new_width) / 2)
     y_offset = int((canvas.height - new_height) / 2)
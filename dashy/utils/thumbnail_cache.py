@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+from pathlib import Path
+from typing import Literal, Union
+
+from PIL import Image
+from PIL.PngImagePlugin import PngInfo
+
+from dashy.utils.disk_cache import atomic_path, evict
+from dashy.utils.resize_image import resize_image
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = Path.home() / ".cache" / "dashy" / "thumbnails"
+DEFAULT_MAX_DISK = 512 * 1024 * 1024
+STAMP_KEY = "dashy-source"
+
+
+class ThumbnailCache:
+    def __init__(
+        self,
+        *,
+        path: Union[Path, str] = DEFAULT_PATH,
+        max_disk: int = DEFAULT_MAX_DISK,
+    ) -> None:
+        if isinstance(path, str):
+            path = Path(path).expanduser()
+        self.path = path
+        self.max_disk = max_disk
+
+    def filename(
+        self, source: Path, size: tuple[int, int], mode: Literal["FIT", "COVER"]
+    ) -> Path:
+        width, height = size
+        key = hashlib.sha256(f"{source}\0{width}x{height}\0{mode}".encode())
+        return self.path / f"{key.hexdigest()}.png"
+
+    def load(
+        self, source: Path, size: tuple[int, int], mode: Literal["FIT", "COVER"]
+    ) -> Image.Image:
+        stat = source.stat()
+        stamp = f"{stat.st_mtime_ns}:{stat.st_size}"
+        filename = self.filename(source, size, mode)
+
+        try:
+            with Image.open(filename) as im:
+                if getattr(im, "text", {}).get(STAMP_KEY) == stamp:
+                    im.load()
+                    os.utime(filename)
+                    return im.copy()
+        except FileNotFoundError:
+            pass
+        except Exception:
+            logger.warning("Discarding unreadable thumbnail %s", filename)
+
+        with Image.open(source) as im:
+            image = resize_image(im, size, mode=mode)
+
+        self.store(filename, image, stamp)
+        return image
+
+    def store(self, filename: Path, image: Image.Image, stamp: str) -> None:
+        info = PngInfo()
+        info.add_text(STAMP_KEY, stamp)
+        try:
+            with atomic_path(filename) as temp_filename:
+                image.save(temp_filename, "PNG", pnginfo=info, compress_level=1)
+        except Exception:
+            logger.exception("Failed to store thumbnail %s:", filename)
+            return
+
+        evict(self.path, self.max_disk, ".png")
+
+    def contains(
+        self, source: Path, size: tuple[int, int], mode: Literal["FIT", "COVER"]
+    ) -> bool:
+        return self.filename(source, size, mode).exists()